@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""离线解析器基准测试：用 fixtures 目录中保存的页面/接口数据测量各平台解析器的速度和内存
+
+用法:
+    python benchmark_parsers.py --output bench_new.json
+    python benchmark_parsers.py --only 'x_timeline[selectolax]' 'x_timeline[lxml]' 'x_timeline[html.parser]'
+    python benchmark_parsers.py --compare bench_old.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def read_fixture(filename):
+    """读取测试数据文件"""
+    with open(os.path.join(FIXTURE_DIR, filename), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+# 每个解析器返回一个无参函数，调用一次解析一份数据并返回解析出的条目数
+# 模块在这里才导入，缺少某个平台的依赖时不影响其他解析器
+
+def x_timeline():
+    from x_scraper import parse_timeline
+    html = read_fixture('nitter_timeline.html')
+    return lambda: int(parse_timeline(html, 'dotey', 'https://nitter.net') is not None)
+
+
+def x_timeline_backend(backend):
+    """用指定的 HTML 解析后端解析 Nitter 时间线（后端未安装时跳过）"""
+    def factory():
+        from html_parser import available_backends
+        from x_scraper import parse_timeline
+        if backend not in available_backends():
+            raise ImportError(name=backend)
+        html = read_fixture('nitter_timeline.html')
+        return lambda: int(parse_timeline(html, 'dotey', 'https://nitter.net', backend=backend) is not None)
+    return factory
+
+
+def x_timeline_full_page(backend):
+    """解析整个页面后再查找第一条推文（只解析第一条推文片段之前的做法，作为对照）"""
+    def factory():
+        from html_parser import available_backends, parse_html
+        if backend not in available_backends():
+            raise ImportError(name=backend)
+        html = read_fixture('nitter_timeline.html')
+        return lambda: int(parse_html(html, backend).find('div', 'timeline-item') is not None)
+    return factory
+
+
+def x_rss():
+    """与爬虫一致，只解析到第一条推文为止的RSS"""
+    import feedparser
+    from x_scraper import read_first_feed_item, parse_feed_item
+    xml = read_fixture('nitter_rss.xml')
+
+    def parse():
+        feed = feedparser.parse(read_first_feed_item([xml]))
+        return int(parse_feed_item(feed.entries[0], 'dotey', 'https://nitter.net') is not None)
+    return parse
+
+
+def x_rss_full():
+    """解析整个RSS（对照）"""
+    import feedparser
+    xml = read_fixture('nitter_rss.xml')
+    return lambda: len(feedparser.parse(xml).entries)
+
+
+def bilibili_arc_search():
+    from bilibili_web_scraper_new import BilibiliWebScraper
+    data = json.loads(read_fixture('bilibili_arc_search.json'))
+    # 与爬虫一致，从接口返回的 JSON 文本开始解析
+    text = json.dumps(data, ensure_ascii=False)
+    return lambda: int(BilibiliWebScraper.parse_latest_video(json.loads(text), '14739873') is not None)
+
+
+def twitter_v2():
+    from twitter_scraper import TwitterScraper
+    scraper = TwitterScraper()
+    text = read_fixture('twitter_v2_tweets.json')
+    return lambda: len(scraper.process_tweets(json.loads(text)))
+
+
+def apple_podcast():
+    from podcast_scraper import parse_podcast_page
+    html = read_fixture('apple_podcast.html')
+    return lambda: len(parse_podcast_page(html))
+
+
+PARSERS = {
+    'x_timeline': x_timeline,
+    'x_timeline[selectolax]': x_timeline_backend('selectolax'),
+    'x_timeline[lxml]': x_timeline_backend('lxml'),
+    'x_timeline[html.parser]': x_timeline_backend('html.parser'),
+    'x_timeline[selectolax,full]': x_timeline_full_page('selectolax'),
+    'x_timeline[lxml,full]': x_timeline_full_page('lxml'),
+    'x_timeline[html.parser,full]': x_timeline_full_page('html.parser'),
+    'x_rss': x_rss,
+    'x_rss[full]': x_rss_full,
+    'bilibili_arc_search': bilibili_arc_search,
+    'twitter_v2': twitter_v2,
+    'apple_podcast': apple_podcast,
+}
+
+
+def measure(parse, iterations):
+    """测量解析速度和峰值内存"""
+    # 预热一次，排除首次导入和缓存的影响
+    parse()
+
+    items = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        items += parse()
+    seconds = time.perf_counter() - start
+
+    # 峰值内存单独测量，tracemalloc 会明显拖慢解析
+    tracemalloc.start()
+    parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'items': items,
+        'seconds': round(seconds, 4),
+        'ms_per_parse': round(seconds * 1000 / iterations, 3),
+        'items_per_second': round(items / seconds, 1) if seconds else None,
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def git_commit():
+    """当前代码的提交号（不在 git 仓库中时返回 None）"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(names, iterations):
+    """运行选中的解析器，返回结果字典"""
+    results = {}
+    for name in names:
+        try:
+            parse = PARSERS[name]()
+        except ImportError as e:
+            print(f"跳过 {name}: 缺少依赖 {e.name}")
+            continue
+        results[name] = measure(parse, iterations)
+        stats = results[name]
+        print(f"{name:<30} {stats['ms_per_parse']:>9.3f} ms/次 "
+              f"{stats['items_per_second']:>10} 条/秒 {stats['peak_memory_kb']:>9.1f} KB")
+    return {
+        'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'parsers': results,
+    }
+
+
+def compare(old_report, new_report):
+    """打印与之前结果的对比（速度和内存的变化百分比）"""
+    print(f"\n与 {old_report.get('commit') or '旧结果'} 对比:")
+    for name, new in new_report['parsers'].items():
+        old = old_report.get('parsers', {}).get(name)
+        if not old:
+            print(f"{name:<30} 无旧数据")
+            continue
+        speed = (old['ms_per_parse'] - new['ms_per_parse']) / old['ms_per_parse'] * 100
+        memory = (new['peak_memory_kb'] - old['peak_memory_kb']) / old['peak_memory_kb'] * 100
+        print(f"{name:<30} 速度 {speed:+.1f}%  内存 {memory:+.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线解析器基准测试')
+    parser.add_argument('--iterations', type=int, default=200, help='每个解析器的解析次数')
+    parser.add_argument('--only', nargs='+', choices=sorted(PARSERS), help='只测试指定的解析器')
+    parser.add_argument('--output', help='将结果保存为JSON文件')
+    parser.add_argument('--compare', help='与之前保存的JSON结果对比')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    report = run_benchmarks(args.only or list(PARSERS), args.iterations)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,8 +4,59 @@ import json
 import webbrowser
 from datetime import datetime
 import re
-import time
 import random
+from metrics import get_metrics, write_report
+from content_store import get_store
+from http_session import create_session, iter_text
+from rate_limiter import get_rate_limiter
+
+metrics = get_metrics('bilibili')
+
+# 所有用户共用一个会话，复用到 api.bilibili.com 的连接
+session = create_session(metrics=metrics)
+
+# 视频列表和响应开头的状态码、消息
+VLIST_PATTERN = re.compile(r'"vlist"\s*:\s*\[')
+WHITESPACE = re.compile(r'\s*')
+CODE_PATTERN = re.compile(r'"code"\s*:\s*(-?\d+)')
+MESSAGE_PATTERN = re.compile(r'"message"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+def read_latest_video(chunks):
+    """逐块读取 arc/search 接口的响应，vlist 中第一个视频完整到达后立即返回，不再读取后面的内容
+
+    提前返回时只包含 code、message 和第一个视频（与完整响应的结构相同）；
+    响应中没有视频（例如被限流）时读完并解析整个响应。
+    """
+    chunks = iter(chunks)
+    decoder = json.JSONDecoder()
+    text = ''
+    vlist = None
+    for chunk in chunks:
+        text += chunk
+        if vlist is None:
+            vlist = VLIST_PATTERN.search(text)
+            if vlist is None:
+                continue
+        start = WHITESPACE.match(text, vlist.end()).end()
+        if text[start:start + 1] in ('', ']'):
+            continue
+        try:
+            video, _ = decoder.raw_decode(text, start)
+        except json.JSONDecodeError:
+            # 第一个视频还没有完整到达
+            continue
+        code = CODE_PATTERN.search(text, 0, vlist.start())
+        message = MESSAGE_PATTERN.search(text, 0, vlist.start())
+        if code is None:
+            # 不是预期的响应结构，读完整个响应
+            text += ''.join(chunks)
+            break
+        return {
+            'code': int(code.group(1)),
+            'message': json.loads(message.group(1)) if message else '',
+            'data': {'list': {'vlist': [video]}},
+        }
+    return json.loads(text)
 
 def get_user_latest_video(uid):
     """
@@ -14,15 +65,14 @@ def get_user_latest_video(uid):
         uid: B站用户ID
     """
     max_retries = 3  # 最大重试次数
-    base_wait = 30   # 基础等待时间（秒）
     
+    # 重试前的等待由会话的限速器决定（遇到 -799 时会暂停 api.bilibili.com）
     for retry in range(max_retries + 1):
         try:
             print(f"\n正在获取用户 {uid} 的最新视频...")
             if retry > 0:
-                wait_time = base_wait * retry  # 递增等待时间
-                print(f"\n第 {retry} 次重试，等待 {wait_time} 秒...")
-                time.sleep(wait_time)
+                print(f"\n第 {retry} 次重试...")
+                metrics.record_retry()
             
             print("正在发送请求...")
             # 使用简化的API
@@ -46,15 +96,16 @@ def get_user_latest_video(uid):
                 'Pragma': 'no-cache',
             }
 
-            session = requests.Session()
-            
             # 获取视频列表
             print("正在发送请求...")
-            response = session.get(api_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            print("正在解析响应...")
-            data = response.json()
+            with session.get(api_url, headers=headers, timeout=10, stream=True) as response:
+                if not response.ok:
+                    # 先读完错误响应（通常很小），连接关闭后出错处理中仍可打印响应内容
+                    metrics.record_bytes(api_url, len(response.content))
+                response.raise_for_status()
+                
+                print("正在解析响应...")
+                data = read_latest_video(iter_text(response, metrics=metrics))
             code = data.get('code', -1)
             message = data.get('message', '')
             
@@ -62,6 +113,7 @@ def get_user_latest_video(uid):
             print(f"API响应消息: {message}")
             
             if code == 0:
+                get_rate_limiter().record_success(api_url)
                 # 解析视频信息
                 if 'data' not in data or 'list' not in data['data'] or 'vlist' not in data['data']['list']:
                     print("响应数据结构不完整")
@@ -88,6 +140,7 @@ def get_user_latest_video(uid):
                 return video_info
             elif code == -799:  # 请求过于频繁
                 print(f"获取视频列表失败: {message}")
+                get_rate_limiter().backoff(api_url)
                 if retry < max_retries:
                     print("遇到频率限制，正在重试...")
                     continue
@@ -100,10 +153,11 @@ def get_user_latest_video(uid):
                 
         except requests.RequestException as e:
             print(f"网络请求失败: {str(e)}")
-            if 'response' in locals():
-                print(f"响应状态码: {response.status_code}")
-                print(f"响应头: {dict(response.headers)}")
-                print(f"响应内容: {response.text}")
+            # 只有状态码错误的响应已完整读出；流式读取中途失败的响应不再读取
+            if isinstance(e, requests.HTTPError) and e.response is not None:
+                print(f"响应状态码: {e.response.status_code}")
+                print(f"响应头: {dict(e.response.headers)}")
+                print(f"响应内容: {e.response.text}")
             if retry < max_retries:
                 print("发生错误，正在重试...")
                 continue
@@ -112,8 +166,7 @@ def get_user_latest_video(uid):
                 return None
         except json.JSONDecodeError as e:
             print(f"JSON解析失败: {str(e)}")
-            if 'response' in locals():
-                print(f"原始响应: {response.text}")
+            print(f"原始响应: {e.doc}")
             if retry < max_retries:
                 print("发生错误，正在重试...")
                 continue
@@ -275,31 +328,37 @@ def generate_html(videos):
     
     return html_file
 
-def save_videos_to_json(videos):
-    """保存视频信息到JSON文件"""
-    output_file = os.path.join(os.path.dirname(__file__), 'bilibili_videos.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(videos, f, ensure_ascii=False, indent=2)
-    print(f"\n视频信息已保存到: {output_file}")
+def save_videos(videos):
+    """保存视频信息到内容库"""
+    count = get_store().upsert_items('bilibili', videos)
+    print(f"\n已保存 {count} 个视频到内容库")
 
-def main():
-    # B站用户ID列表
-    users = [
-        '5758057',     # 用户ID
-    ]
-    
+# B站用户ID列表
+USERS = [
+    '5758057',     # 用户ID
+]
+
+def run(users=USERS):
+    """运行爬虫：获取视频、保存文件，并返回视频列表"""
     all_videos = []
     for uid in users:
-        video = get_user_latest_video(uid)
+        with metrics.track():
+            video = get_user_latest_video(uid)
         if video:
             all_videos.append(video)
     
     if all_videos:
         html_file = generate_html(all_videos)
-        save_videos_to_json(all_videos)
+        save_videos(all_videos)
         print(f"\n共获取到 {len(all_videos)} 个视频的信息")
     else:
         print("\n未找到任何视频。")
+    
+    return all_videos
+
+def main():
+    run()
+    write_report('bilibili_run_report.json', names=['bilibili'])
 
 if __name__ == '__main__':
     main()
@@ -3,14 +3,17 @@
 
 import sys
 import locale
-import requests
 from bs4 import BeautifulSoup
 import json
 import logging
 from datetime import datetime
-import time
-import random
 from typing import List, Dict, Any
+from metrics import get_metrics, write_report
+from content_store import get_store
+from http_session import create_session
+from rate_limiter import get_rate_limiter
+
+metrics = get_metrics('bilibili')
 
 # 设置默认编码为UTF-8
 sys.stdout.reconfigure(encoding='utf-8')
@@ -20,6 +23,8 @@ class BilibiliWebScraper:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.setup_logging()
+        # 请求间隔由会话的限速器控制；用户信息很少变化，使用共享的响应缓存
+        self.session = create_session(metrics=metrics, cache=True)
         
         # 从配置文件加载Cookie
         try:
@@ -81,15 +86,12 @@ class BilibiliWebScraper:
                 'User-Agent': 'Mozilla/5.0 (Linux; Android 11; Pixel 5) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36',
                 'Accept': 'application/json, text/plain, */*',
                 'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7',
-                'Accept-Encoding': 'gzip, deflate, br',
                 'Origin': 'https://m.bilibili.com',
                 'Referer': f'https://m.bilibili.com/space/{user_id}'
             }
             
             self.logger.info("正在获取最新视频信息...")
-            time.sleep(random.uniform(5, 8))
-            
-            response = requests.get(
+            response = self.session.get(
                 api_url,
                 params=params,
                 headers=mobile_headers,
@@ -101,10 +103,11 @@ class BilibiliWebScraper:
             self.logger.info(f"API响应: {data}")
             
             if data['code'] == -799:  # 请求频率限制
-                self.logger.warning("触发请求频率限制，等待更长时间后重试...")
-                time.sleep(random.uniform(10, 15))
+                self.logger.warning("触发请求频率限制，等待限速器暂停结束后重试...")
+                metrics.record_retry()
+                get_rate_limiter().backoff(api_url)
                 
-                response = requests.get(
+                response = self.session.get(
                     api_url,
                     params=params,
                     headers=mobile_headers,
@@ -114,11 +117,11 @@ class BilibiliWebScraper:
                 data = response.json()
                 self.logger.info(f"重试后API响应: {data}")
             
+            if data['code'] == 0:
+                get_rate_limiter().record_success(api_url)
             if data['code'] == 0 and 'data' in data and 'list' in data['data'] and 'vlist' in data['data']['list'] and data['data']['list']['vlist']:
                 video = data['data']['list']['vlist'][0]
                 
-                time.sleep(random.uniform(3, 5))
-                
                 # 获取用户信息
                 user_info_api = f'https://api.bilibili.com/x/space/acc/info'  # 修改API端点
                 user_params = {
@@ -126,7 +129,7 @@ class BilibiliWebScraper:
                     'jsonp': 'jsonp'
                 }
                 
-                user_response = requests.get(
+                user_response = self.session.get(
                     user_info_api,
                     params=user_params,
                     headers=mobile_headers,
@@ -162,14 +165,13 @@ class BilibiliWebScraper:
             self.logger.error(f"获取用户 {user_id} 的视频时出错: {str(e)}")
             return None
 
-    def save_videos_to_json(self, videos: List[Dict[str, Any]], output_file: str = 'bilibili_videos.json') -> None:
-        """保存视频信息到JSON文件"""
+    def save_videos(self, videos: List[Dict[str, Any]]) -> None:
+        """保存视频信息到内容库"""
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(videos, f, ensure_ascii=False, indent=2)
-            self.logger.info(f"已保存视频信息到 {output_file}")
+            count = get_store().upsert_items('bilibili', videos)
+            self.logger.info(f"已保存 {count} 个视频到内容库")
         except Exception as e:
-            self.logger.error(f"保存JSON文件时出错: {str(e)}")
+            self.logger.error(f"保存到内容库时出错: {str(e)}")
 
     def run_scraper(self) -> None:
         """运行爬虫"""
@@ -182,13 +184,13 @@ class BilibiliWebScraper:
         all_videos = []
         
         for user_id in user_ids:
-            video = self.get_latest_video(user_id)
+            with metrics.track():
+                video = self.get_latest_video(user_id)
             if video:
                 all_videos.append(video)
-                time.sleep(random.uniform(3, 5))  # 添加延迟
         
         if all_videos:
-            self.save_videos_to_json(all_videos)
+            self.save_videos(all_videos)
             print(f"\n总计获取到 {len(all_videos)} 个视频")
             
             # 打印每个视频的基本信息
@@ -204,3 +206,4 @@ class BilibiliWebScraper:
 if __name__ == "__main__":
     scraper = BilibiliWebScraper()
     scraper.run_scraper()
+    write_report('bilibili_run_report.json', names=['bilibili'])
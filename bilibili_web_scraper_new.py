@@ -4,16 +4,17 @@
 import os
 import sys
 import json
-import requests
 from datetime import datetime
-import time
-import random
 import logging
 from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
 import subprocess
 import shutil
-import schedule
+from metrics import get_metrics, write_report
+from content_store import get_store
+from http_session import create_session
+from rate_limiter import get_rate_limiter
+
+metrics = get_metrics('bilibili')
 
 # 设置默认编码为UTF-8
 sys.stdout.reconfigure(encoding='utf-8')
@@ -22,7 +23,6 @@ sys.stderr.reconfigure(encoding='utf-8')
 class BilibiliWebScraper:
     def __init__(self):
         self.setup_logging()
-        self.cache_file = 'bilibili_cache.json'
         
         # 设置请求头
         self.headers = {
@@ -36,6 +36,8 @@ class BilibiliWebScraper:
             'Origin': 'https://space.bilibili.com',
             'Referer': 'https://space.bilibili.com'
         }
+        # 请求间隔由会话的限速器控制
+        self.session = create_session(metrics=metrics)
         
     def setup_logging(self):
         """设置日志"""
@@ -49,12 +51,37 @@ class BilibiliWebScraper:
         )
         self.logger = logging.getLogger(__name__)
 
+    @staticmethod
+    def parse_latest_video(data, user_id):
+        """解析 arc/search 接口返回的数据，返回最新视频信息（没有视频时返回 None）"""
+        if data['code'] == 0 and data['data']['list']['vlist']:
+            video = data['data']['list']['vlist'][0]
+            
+            return {
+                'title': video['title'],
+                'url': f"https://www.bilibili.com/video/{video['bvid']}",
+                'platform': 'bilibili',
+                'author': video['author'],
+                'user_id': user_id,
+                'bvid': video['bvid'],
+                'aid': str(video['aid']),
+                'description': video.get('description', ''),
+                'created': datetime.fromtimestamp(video['created']).strftime('%Y-%m-%d %H:%M:%S'),
+                'length': video.get('length', ''),
+                'play': video.get('play', 0),
+                'comment': video.get('comment', 0),
+                'thumbnail': video.get('pic', ''),
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+        return None
+
     def get_user_latest_video(self, user_id):
         """获取用户的最新视频"""
         max_retries = 3
-        retry_delay = 5  # 秒
         
         for retry in range(max_retries):
+            if retry > 0:
+                metrics.record_retry()
             try:
                 # 使用API获取用户视频列表
                 api_url = f'https://api.bilibili.com/x/space/arc/search'
@@ -68,38 +95,22 @@ class BilibiliWebScraper:
                 }
                 
                 self.logger.info(f"正在获取用户 {user_id} 的视频列表... (尝试 {retry + 1}/{max_retries})")
-                response = requests.get(api_url, params=params, headers=self.headers)
+                response = self.session.get(api_url, params=params, headers=self.headers)
                 
                 if response.status_code == 200:
                     try:
                         data = response.json()
-                        if data['code'] == 0 and data['data']['list']['vlist']:
-                            video = data['data']['list']['vlist'][0]
-                            
-                            video_info = {
-                                'title': video['title'],
-                                'url': f"https://www.bilibili.com/video/{video['bvid']}",
-                                'platform': 'bilibili',
-                                'author': video['author'],
-                                'user_id': user_id,
-                                'bvid': video['bvid'],
-                                'aid': str(video['aid']),
-                                'description': video.get('description', ''),
-                                'created': datetime.fromtimestamp(video['created']).strftime('%Y-%m-%d %H:%M:%S'),
-                                'length': video.get('length', ''),
-                                'play': video.get('play', 0),
-                                'comment': video.get('comment', 0),
-                                'thumbnail': video.get('pic', ''),
-                                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                            }
-                            
+                        if data.get('code') == 0:
+                            get_rate_limiter().record_success(api_url)
+                        video_info = self.parse_latest_video(data, user_id)
+                        if video_info:
                             self.logger.info(f"成功获取视频: {video_info['title']}")
                             return video_info
                         else:
                             error_msg = data.get('message', '未知错误')
-                            if '请求过于频繁' in error_msg:
-                                self.logger.warning(f"API请求频率限制，等待 {retry_delay} 秒后重试...")
-                                time.sleep(retry_delay)
+                            if data.get('code') == -799 or '请求过于频繁' in error_msg:
+                                self.logger.warning("API请求频率限制，等待限速器暂停结束后重试...")
+                                get_rate_limiter().backoff(api_url)
                                 continue
                             else:
                                 self.logger.error(f"API返回错误: {error_msg}")
@@ -107,63 +118,25 @@ class BilibiliWebScraper:
                         self.logger.error(f"解析API响应时出错: {str(e)}")
                 else:
                     self.logger.error(f"API请求失败，状态码: {response.status_code}")
-                
-                # 如果是最后一次重试，等待时间加倍
-                if retry < max_retries - 1:
-                    self.logger.info(f"等待 {retry_delay} 秒后重试...")
-                    time.sleep(retry_delay)
                     
             except Exception as e:
                 self.logger.error(f"获取用户 {user_id} 的视频时出错: {str(e)}")
-                if retry < max_retries - 1:
-                    self.logger.info(f"等待 {retry_delay} 秒后重试...")
-                    time.sleep(retry_delay)
         
         self.logger.warning(f"未找到用户 {user_id} 的视频数据")
         return None
 
-    def save_videos_to_json(self, videos, filename='bilibili_videos.json'):
-        """保存视频信息到JSON文件"""
+    def save_videos(self, videos):
+        """保存视频信息到内容库"""
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(videos, f, ensure_ascii=False, indent=2)
-            self.logger.info(f"已保存视频信息到 {filename}")
+            count = get_store().upsert_items('bilibili', videos)
+            self.logger.info(f"已保存 {count} 个视频到内容库")
         except Exception as e:
-            self.logger.error(f"保存JSON文件时出错: {str(e)}")
-
-    def load_video_cache(self):
-        """加载视频缓存"""
-        try:
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
-        except Exception as e:
-            self.logger.error(f"加载缓存失败: {str(e)}")
-            return {}
-
-    def save_video_cache(self, cache):
-        """保存视频缓存"""
-        try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            self.logger.error(f"保存缓存失败: {str(e)}")
+            self.logger.error(f"保存到内容库时出错: {str(e)}")
 
     def has_new_videos(self, videos):
-        """检查是否有新视频"""
-        cache = self.load_video_cache()
-        has_new = False
-        
-        for video in videos:
-            user_id = video['user_id']
-            bvid = video['bvid']
-            if str(user_id) not in cache or cache[str(user_id)]['bvid'] != bvid:
-                has_new = True
-                cache[str(user_id)] = video
-        
-        self.save_video_cache(cache)
-        return has_new
+        """检查是否有还没处理过的视频（需在保存之前调用）"""
+        store = get_store()
+        return any(not store.is_seen('bilibili', video['bvid']) for video in videos)
 
     def update_dashboard(self, video_info):
         """更新仪表板数据"""
@@ -247,25 +220,28 @@ class BilibiliWebScraper:
             all_videos = []
             
             for user_id in user_ids:
-                video_info = self.get_user_latest_video(str(user_id))
+                with metrics.track():
+                    video_info = self.get_user_latest_video(str(user_id))
                 if video_info:
                     all_videos.append(video_info)
                     print(f"成功获取到视频: {video_info['title']}")
                 else:
                     print(f"未能获取到用户 {user_id} 的视频信息")
-                
-                # 添加随机延迟，避免请求过快
-                time.sleep(random.uniform(3, 5))
             
             if all_videos:
-                # 保存所有视频信息到JSON
-                self.save_videos_to_json(all_videos)
+                # 保存之前检查是否有新视频（保存后所有视频都会被记为已处理）
+                has_new = self.has_new_videos(all_videos)
+                self.save_videos(all_videos)
                 
-                # 更新仪表板（使用最新的视频）
-                latest_video = max(all_videos, key=lambda x: x['created'])
-                self.update_dashboard(latest_video)
+                # 有新视频时才更新仪表板（使用最新的视频），避免没有变化时重复推送
+                if has_new:
+                    latest_video = max(all_videos, key=lambda x: x['created'])
+                    self.update_dashboard(latest_video)
+                else:
+                    print("没有新视频，跳过更新仪表板")
                 
                 print(f"\n总计获取到 {len(all_videos)} 个用户的最新视频")
+                write_report('bilibili_run_report.json', names=['bilibili'])
             else:
                 print("\n未能获取到任何视频信息")
                 
@@ -297,20 +273,9 @@ def main():
         logger.info(f"当前工作目录: {os.getcwd()}")
         logger.info(f"脚本位置: {os.path.abspath(__file__)}")
         
-        # 设置每天早上8点运行
-        schedule.every().day.at("08:00").do(BilibiliWebScraper().run_scraper)
-        
-        logger.info("定时任务已设置：每天早上8点运行")
-        logger.info("开始执行第一次抓取...")
-        
-        # 立即运行一次
+        # 定时运行由常驻调度进程 scheduler.py 的 bilibili_web 任务负责（每天 08:00），这里只执行一次抓取
         BilibiliWebScraper().run_scraper()
-        
-        logger.info("进入定时任务循环...")
-        # 保持程序运行
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+        logger.info("抓取完成；定时运行请使用 scheduler.py（任务 bilibili_web）")
             
     except Exception as e:
         logger.error(f"程序出错: {str(e)}", exc_info=True)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import math
+import hashlib
+
+# 默认误判率：约 1% 的已见判断需要再查一次精确集合
+DEFAULT_ERROR_RATE = 0.01
+
+
+class BloomFilter:
+    """布隆过滤器：判断为“不存在”时一定不存在，判断为“存在”时可能误判"""
+
+    def __init__(self, capacity, error_rate=DEFAULT_ERROR_RATE):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        # 位数 m = -n·ln(p) / (ln2)²，哈希函数个数 k = m/n·ln2
+        self.size = max(64, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, key):
+        """由一次哈希派生出 k 个位置（双重哈希）"""
+        digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+    def is_full(self):
+        """元素数超过容量后误判率会明显上升，应按更大的容量重建"""
+        return self.count > self.capacity
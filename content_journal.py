@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import struct
+import threading
+
+# 索引文件中每条记录在日志文件中的起始位置（8字节无符号整数）
+OFFSET_FORMAT = '<Q'
+OFFSET_SIZE = struct.calcsize(OFFSET_FORMAT)
+
+
+class ContentJournal:
+    """只追加的 JSONL 日志：每次添加只写一行，配合偏移索引可直接读取最近的记录
+
+    日志文件是唯一的数据来源；索引文件只记录每行的起始位置，损坏或不完整时会从日志重建。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.check_index()
+
+    def check_index(self):
+        """确认索引覆盖了日志中的所有记录，否则重建"""
+        journal_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        index_size = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+        if journal_size == 0 and index_size == 0:
+            return
+        if index_size % OFFSET_SIZE == 0 and index_size > 0:
+            with open(self.index_path, 'rb') as f:
+                f.seek(index_size - OFFSET_SIZE)
+                last_offset, = struct.unpack(OFFSET_FORMAT, f.read(OFFSET_SIZE))
+            with open(self.path, 'rb') as f:
+                f.seek(last_offset)
+                f.readline()
+                if last_offset < journal_size and f.tell() == journal_size:
+                    return
+        self.rebuild_index()
+
+    def rebuild_index(self):
+        """扫描日志重建偏移索引（丢弃末尾写了一半的记录）"""
+        offsets = []
+        valid_size = 0
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                while True:
+                    offset = f.tell()
+                    line = f.readline()
+                    if not line.endswith(b'\n'):
+                        break
+                    offsets.append(offset)
+                    valid_size = f.tell()
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_size)
+        with open(self.index_path, 'wb') as f:
+            f.write(b''.join(struct.pack(OFFSET_FORMAT, offset) for offset in offsets))
+
+    def append(self, record):
+        """追加一条记录（O(1)，与日志大小无关）"""
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self.lock:
+            with open(self.path, 'ab') as f:
+                offset = f.tell()
+                f.write(line)
+            with open(self.index_path, 'ab') as f:
+                f.write(struct.pack(OFFSET_FORMAT, offset))
+
+    def __len__(self):
+        if not os.path.exists(self.index_path):
+            return 0
+        return os.path.getsize(self.index_path) // OFFSET_SIZE
+
+    def recent(self, count):
+        """读取最近的 count 条记录（最新的在前），只读取需要的部分"""
+        with self.lock:
+            total = len(self)
+            count = min(count, total)
+            if count <= 0:
+                return []
+            with open(self.index_path, 'rb') as f:
+                f.seek((total - count) * OFFSET_SIZE)
+                data = f.read(count * OFFSET_SIZE)
+            offsets = [offset for offset, in struct.iter_unpack(OFFSET_FORMAT, data)]
+            records = []
+            with open(self.path, 'rb') as f:
+                for offset in reversed(offsets):
+                    f.seek(offset)
+                    records.append(json.loads(f.readline()))
+            return records
+
+    def entries(self):
+        """按写入顺序读取所有记录"""
+        with self.lock:
+            if not os.path.exists(self.path):
+                return []
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return [json.loads(line) for line in f if line.strip()]
+
+    def clear(self, count=None):
+        """删除前 count 条记录（默认全部），在记录已合并到快照之后调用"""
+        with self.lock:
+            if count is None or count >= len(self):
+                for path in (self.path, self.index_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                return
+            with open(self.index_path, 'rb') as f:
+                f.seek(count * OFFSET_SIZE)
+                rest = [offset for offset, in struct.iter_unpack(OFFSET_FORMAT, f.read())]
+            with open(self.path, 'rb') as f:
+                f.seek(rest[0])
+                remaining = f.read()
+            base = rest[0]
+            for path, data in (
+                (self.path, remaining),
+                (self.index_path, b''.join(struct.pack(OFFSET_FORMAT, offset - base) for offset in rest)),
+            ):
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from bloom_filter import BloomFilter
+
+# 所有平台内容统一保存在这个 SQLite 数据库中
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content.db')
+
+# 爬虫抓取的内容和手动添加的内容分开保存
+SCRAPED = 'scraped'
+UPLOADS = 'uploads'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    collection TEXT NOT NULL DEFAULT 'scraped',
+    platform TEXT NOT NULL,
+    platform_id TEXT NOT NULL,
+    author TEXT,
+    title TEXT,
+    url TEXT,
+    published TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    data TEXT NOT NULL,
+    UNIQUE (collection, platform, platform_id)
+);
+CREATE INDEX IF NOT EXISTS idx_items_platform_author_published
+    ON items (platform, author, published);
+CREATE TABLE IF NOT EXISTS seen (
+    platform TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    PRIMARY KEY (platform, item_id)
+) WITHOUT ROWID;
+"""
+
+# 每个平台的布隆过滤器初始容量，已见ID数超过容量时按两倍重建
+SEEN_MIN_CAPACITY = 10000
+
+# 内容中可作为平台ID的字段（按优先级）
+ID_FIELDS = ('platform_id', 'bvid', 'tweet_id', 'video_id', 'id')
+
+# 从链接中提取平台ID
+ID_PATTERNS = (
+    re.compile(r'(BV\w{10})'),              # B站
+    re.compile(r'[?&]v=([\w-]{11})'),       # YouTube
+    re.compile(r'/status/(\d+)'),           # X / Twitter
+)
+
+AUTHOR_FIELDS = ('author', 'channel', 'podcast_title', 'username')
+TIME_FIELDS = ('time', 'created', 'created_at', 'published', 'publish_time', 'date')
+TIME_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%d')
+
+
+def platform_id_of(item):
+    """内容的平台ID：优先使用ID字段，其次从链接中提取，最后使用链接或标题的哈希"""
+    for field in ID_FIELDS:
+        if item.get(field):
+            return str(item[field])
+    url = item.get('url') or ''
+    for pattern in ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    if url:
+        return url
+    key = f"{item.get('title', '')}|{item.get('author', '')}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+def author_of(item):
+    for field in AUTHOR_FIELDS:
+        if item.get(field):
+            return str(item[field])
+    return None
+
+
+def published_of(item):
+    """内容的发布时间，统一为 '%Y-%m-%d %H:%M:%S'（无法解析时返回 None）"""
+    for field in TIME_FIELDS:
+        value = item.get(field)
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        if not value or not isinstance(value, str):
+            continue
+        for fmt in TIME_FORMATS:
+            try:
+                return datetime.strptime(value, fmt).strftime('%Y-%m-%d %H:%M:%S')
+            except ValueError:
+                continue
+        try:
+            return datetime.fromisoformat(value).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            continue
+    return None
+
+
+class ContentStore:
+    """统一内容库：每条内容一行，按 (平台, 平台ID) 去重更新"""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.lock = threading.Lock()
+        # 多个线程共用一个连接，由 lock 串行化；WAL 模式下其他进程可以同时读取
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        # 各平台已见ID的布隆过滤器，首次查询时从 seen 表加载
+        self.seen_filters = {}
+        self.import_seen()
+
+    def import_seen(self):
+        """seen 表为空时，把内容库中已有的内容登记为已见"""
+        with self.lock, self.conn:
+            if self.conn.execute('SELECT 1 FROM seen LIMIT 1').fetchone():
+                return
+            self.conn.execute("""
+                INSERT OR IGNORE INTO seen (platform, item_id, first_seen)
+                SELECT platform, platform_id, first_seen FROM items WHERE collection = ?
+            """, (SCRAPED,))
+
+    def upsert_items(self, platform, items, collection=SCRAPED):
+        """写入内容，已存在的内容（相同平台ID）更新为最新数据，返回写入条数"""
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [
+            (
+                collection, platform, platform_id_of(item), author_of(item), item.get('title'),
+                item.get('url'), published_of(item), now, now,
+                json.dumps(item, ensure_ascii=False, default=str)
+            )
+            for item in items
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany("""
+                INSERT INTO items (collection, platform, platform_id, author, title, url, published,
+                                   first_seen, last_seen, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (collection, platform, platform_id) DO UPDATE SET
+                    author = excluded.author,
+                    title = excluded.title,
+                    url = excluded.url,
+                    published = COALESCE(excluded.published, items.published),
+                    last_seen = excluded.last_seen,
+                    data = excluded.data
+            """, rows)
+            if collection == SCRAPED:
+                self.add_seen(platform, [row[2] for row in rows], now)
+        return len(rows)
+
+    def seen_filter(self, platform):
+        """平台的布隆过滤器（调用方需持有 lock）"""
+        bloom = self.seen_filters.get(platform)
+        if bloom is None or bloom.is_full():
+            ids = [row[0] for row in self.conn.execute(
+                'SELECT item_id FROM seen WHERE platform = ?', (platform,)
+            )]
+            bloom = BloomFilter(max(SEEN_MIN_CAPACITY, len(ids) * 2))
+            for item_id in ids:
+                bloom.add(item_id)
+            self.seen_filters[platform] = bloom
+        return bloom
+
+    def add_seen(self, platform, item_ids, now):
+        """写入 seen 表并更新布隆过滤器（调用方需持有 lock 并处于事务中）"""
+        self.conn.executemany(
+            'INSERT OR IGNORE INTO seen (platform, item_id, first_seen) VALUES (?, ?, ?)',
+            [(platform, str(item_id), now) for item_id in item_ids]
+        )
+        bloom = self.seen_filter(platform)
+        for item_id in item_ids:
+            bloom.add(str(item_id))
+
+    def mark_seen(self, platform, item_ids):
+        """把内容ID登记为已处理（写入内容库的内容会自动登记）"""
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self.lock, self.conn:
+            self.add_seen(platform, list(item_ids), now)
+
+    def is_seen(self, platform, item_id):
+        """内容ID是否处理过：布隆过滤器判断不存在时直接返回，否则再查精确集合
+
+        其他进程新登记的ID在本进程重建过滤器之前可能被判断为未见，只会多抓取一次。
+        """
+        item_id = str(item_id)
+        with self.lock:
+            if item_id not in self.seen_filter(platform):
+                return False
+            return self.conn.execute(
+                'SELECT 1 FROM seen WHERE platform = ? AND item_id = ?', (platform, item_id)
+            ).fetchone() is not None
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def latest_per_author(self, platform, per_author=1, collection=SCRAPED):
+        """每个作者最新的 per_author 条内容，按发布时间从新到旧"""
+        rows = self.query("""
+            SELECT data FROM (
+                SELECT data, COALESCE(published, first_seen) AS sort_time,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY author ORDER BY COALESCE(published, first_seen) DESC, id DESC
+                       ) AS rank
+                FROM items
+                WHERE collection = ? AND platform = ?
+            )
+            WHERE rank <= ?
+            ORDER BY sort_time DESC
+        """, (collection, platform, per_author))
+        return [json.loads(row['data']) for row in rows]
+
+    def recent_items(self, platform, limit=None, author=None, collection=SCRAPED, order='published'):
+        """最近的内容；order='added' 时按加入内容库的先后排序"""
+        sort = 'first_seen DESC, id DESC' if order == 'added' else 'COALESCE(published, first_seen) DESC, id DESC'
+        sql = 'SELECT data FROM items WHERE collection = ? AND platform = ?'
+        params = [collection, platform]
+        if author is not None:
+            sql += ' AND author = ?'
+            params.append(author)
+        sql += f' ORDER BY {sort}'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [json.loads(row['data']) for row in self.query(sql, params)]
+
+    def get_item(self, platform, platform_id, collection=SCRAPED):
+        """按平台ID读取已保存的内容，不存在时返回 None"""
+        rows = self.query(
+            'SELECT data FROM items WHERE collection = ? AND platform = ? AND platform_id = ?',
+            (collection, platform, str(platform_id))
+        )
+        return json.loads(rows[0]['data']) if rows else None
+
+    def has_item(self, platform, platform_id, collection=SCRAPED):
+        """内容是否已在内容库中"""
+        rows = self.query(
+            'SELECT 1 FROM items WHERE collection = ? AND platform = ? AND platform_id = ? LIMIT 1',
+            (collection, platform, str(platform_id))
+        )
+        return bool(rows)
+
+    def platforms(self, collection=SCRAPED):
+        return [row['platform'] for row in self.query(
+            'SELECT DISTINCT platform FROM items WHERE collection = ?', (collection,)
+        )]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=DEFAULT_DB):
+    """获取（或打开）指定路径的内容库，同一进程内共用"""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = ContentStore(path)
+        return _stores[path]
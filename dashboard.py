@@ -1,15 +1,59 @@
 import os
 import json
+import time
+import asyncio
+import hashlib
+import re
 from datetime import datetime
 import concurrent.futures
-import subprocess
 import sys
-from jinja2 import Template
-import shutil
+import argparse
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+from pipeline import ScraperPipeline, GLOBAL_LIMIT
+from output_writer import OutputWriter
+from content_store import get_store, author_of
+
+# 爬虫名称到脚本模块名的映射
+SCRAPER_MODULES = {
+    'youtube': 'youtube_scraper',
+    'x': 'x_scraper',
+    'bilibili': 'bilibili_scraper',
+    'twitter': 'twitter_scraper',
+    'wechat': 'wechat_scraper',
+    'xiaohongshu': 'xiaohongshu_scraper',
+    'podcast': 'podcast_scraper',
+}
+
+# 模板中可单独缓存的平台区块及其对应的数据分区
+TEMPLATE_SECTIONS = {
+    'twitter_section': 'twitter',
+    'bilibili_section': 'bilibili',
+    'youtube_section': 'youtube',
+}
+
+# 子进程模式下单个爬虫的最长运行时间（秒），超时后强制结束
+SCRAPER_TIMEOUT = 600
+
+# 已生成页面中的更新时间
+UPDATED_AT_PATTERN = re.compile(r'更新时间: (.*?)</p>')
+
+# 爬虫名称到仪表板数据分区的映射
+DATA_SECTIONS = {
+    'youtube': 'youtube',
+    'x': 'twitter',
+    'bilibili': 'bilibili',
+}
 
 class Dashboard:
-    def __init__(self):
+    def __init__(self, use_subprocess=False, platform_limits=None, global_limit=GLOBAL_LIMIT,
+                 scraper_timeout=SCRAPER_TIMEOUT):
         self.output_dir = os.path.dirname(os.path.abspath(__file__))
+        # 默认在当前进程内运行爬虫；use_subprocess=True 时每个爬虫使用独立的解释器进程
+        self.use_subprocess = use_subprocess
+        self.scraper_timeout = scraper_timeout
+        # 进程内模式下的并发上限（见 pipeline.PLATFORM_LIMITS）
+        self.platform_limits = platform_limits
+        self.global_limit = global_limit
         self.docs_dir = os.path.join(self.output_dir, 'docs')
         self.data = {
             'youtube': [],
@@ -19,139 +63,254 @@ class Dashboard:
         
         # 确保 docs 目录存在
         os.makedirs(self.docs_dir, exist_ok=True)
+        
+        # 模板环境：编译结果缓存在磁盘上，跨进程复用
+        cache_dir = os.path.join(self.output_dir, '.jinja_cache')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.template_env = Environment(
+            loader=FileSystemLoader(self.output_dir),
+            bytecode_cache=FileSystemBytecodeCache(cache_dir)
+        )
+        
+        # 平台区块缓存：{(区块名, 数据哈希): HTML}，模板变化时清空
+        self.section_cache = {}
+        self.section_cache_template = None
+        
+        # 记录本次生成的文件是否有变化
+        self.writer = OutputWriter()
+    
+    def create_pipeline(self, platforms):
+        """创建异步抓取流水线"""
+        return ScraperPipeline(
+            platforms=platforms,
+            platform_limits=self.platform_limits,
+            global_limit=self.global_limit
+        )
     
     def run_scraper(self, scraper_name):
-        """运行爬虫脚本"""
+        """运行爬虫，返回爬取结果列表（子进程模式下返回 None）"""
+        if self.use_subprocess:
+            return self.run_scraper_subprocess(scraper_name)
+        return self.run_scraper_inprocess(scraper_name)
+    
+    def run_scraper_inprocess(self, scraper_name):
+        """在当前进程内运行单个爬虫"""
         try:
-            script_name = f"{scraper_name}_scraper.py"
-            if scraper_name == 'x':
-                script_name = "x_scraper.py"
-                
-            script_path = os.path.join(self.output_dir, script_name)
             print(f"\n正在运行 {scraper_name} 爬虫...")
-            
-            process = subprocess.Popen(
-                [sys.executable, script_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            while True:
-                output = process.stdout.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    print(f"[{scraper_name}] {output.strip()}")
-            
-            _, stderr = process.communicate()
-            if process.returncode != 0:
-                print(f"{scraper_name} 爬虫运行失败:")
-                print(stderr)
+            results = self.create_pipeline([scraper_name]).run().get(scraper_name)
+            print(f"{scraper_name} 爬虫运行完成")
+            return results
+        except Exception as e:
+            print(f"运行 {scraper_name} 爬虫时出错: {str(e)}")
+            return None
+    
+    def run_scraper_subprocess(self, scraper_name):
+        """在独立的Python解释器中运行爬虫脚本"""
+        try:
+            print(f"\n正在运行 {scraper_name} 爬虫...")
+            returncode = asyncio.run(self.stream_scraper_process(scraper_name))
+            if returncode is None:
+                print(f"{scraper_name} 爬虫运行超过 {self.scraper_timeout} 秒，已强制结束")
+            elif returncode != 0:
+                print(f"{scraper_name} 爬虫运行失败，退出码: {returncode}")
             else:
                 print(f"{scraper_name} 爬虫运行完成")
                 
         except Exception as e:
             print(f"运行 {scraper_name} 爬虫时出错: {str(e)}")
     
+    async def stream_scraper_process(self, scraper_name):
+        """启动爬虫子进程，同时读取 stdout 和 stderr 并为每行加上时间，返回退出码（超时返回 None）"""
+        script_path = os.path.join(self.output_dir, f"{SCRAPER_MODULES[scraper_name]}.py")
+        env = dict(os.environ, PYTHONIOENCODING='utf-8', PYTHONUNBUFFERED='1')
+        start = time.monotonic()
+        
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, script_path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+            limit=1024 * 1024
+        )
+        
+        async def pump(stream, label):
+            async for raw_line in stream:
+                line = raw_line.decode('utf-8', errors='replace').rstrip()
+                if line:
+                    clock = datetime.now().strftime('%H:%M:%S')
+                    elapsed = time.monotonic() - start
+                    print(f"[{scraper_name}][{clock} +{elapsed:.1f}s]{label} {line}")
+        
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(pump(process.stdout, ''), pump(process.stderr, '[stderr]'), process.wait()),
+                timeout=self.scraper_timeout
+            )
+        except asyncio.TimeoutError:
+            await self.kill_process(process)
+            return None
+        except (ValueError, asyncio.LimitOverrunError) as e:
+            # 单行输出超过读取缓冲区上限：结束子进程后再报告错误
+            await self.kill_process(process)
+            raise RuntimeError(f"{scraper_name} 爬虫输出的单行内容过长: {str(e)}") from e
+        
+        return process.returncode
+    
+    @staticmethod
+    async def kill_process(process):
+        """强制结束子进程并等待其退出"""
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        await process.wait()
+    
     def run_scrapers(self):
-        """并行运行所有爬虫"""
-        scrapers = ['youtube', 'x', 'bilibili']
+        """并行运行所有爬虫，返回 {爬虫名称: 结果列表}"""
+        scrapers = list(SCRAPER_MODULES)
         
         print("\n开始并行运行爬虫...")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+        if not self.use_subprocess:
+            # 先从内容库加载已有数据，抓取失败的平台和作者保留上次的内容，不会在页面上被清空
+            self.load_stored_data()
+            return self.create_pipeline(scrapers).run(on_result=self.add_results)
+        
+        results = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(scrapers)) as executor:
             futures = {executor.submit(self.run_scraper, scraper): scraper for scraper in scrapers}
             
             for future in concurrent.futures.as_completed(futures):
                 scraper = futures[future]
                 try:
-                    future.result()
+                    results[scraper] = future.result()
                 except Exception as e:
                     print(f"{scraper} 爬虫执行失败: {str(e)}")
+        
+        return results
     
-    def load_youtube_videos(self):
-        """加载YouTube视频数据"""
-        try:
-            json_file = os.path.join(self.output_dir, 'youtube_videos.json')
-            if os.path.exists(json_file):
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    self.data['youtube'] = json.load(f)
-                    print(f"加载了 {len(self.data['youtube'])} 个YouTube视频")
-        except Exception as e:
-            print(f"加载YouTube视频失败: {str(e)}")
+    def add_results(self, scraper_name, items):
+        """将爬虫返回的结果直接加入仪表板数据，替换同一作者已有的内容"""
+        section = DATA_SECTIONS.get(scraper_name)
+        if section:
+            authors = {author_of(item) for item in items}
+            self.data[section] = list(items) + [
+                item for item in self.data[section] if author_of(item) not in authors
+            ]
+            print(f"[{scraper_name}] 收到 {len(items)} 条内容")
+
+    def replace_results(self, scraper_name, items):
+        """用爬虫本轮的完整结果替换仪表板中该平台的数据（常驻进程重复抓取时使用）"""
+        section = DATA_SECTIONS.get(scraper_name)
+        if section:
+            self.data[section] = list(items)
+
+    def load_stored_data(self):
+        """从内容库加载每个作者的最新内容（抓取前和子进程模式抓取后、常驻进程启动时使用）"""
+        store = get_store()
+        for scraper_name, section in DATA_SECTIONS.items():
+            try:
+                self.data[section] = store.latest_per_author(scraper_name)
+                print(f"加载了 {len(self.data[section])} 条 {scraper_name} 内容")
+            except Exception as e:
+                print(f"加载 {scraper_name} 内容失败: {str(e)}")
     
-    def load_twitter_tweets(self):
-        """加载Twitter推文数据"""
-        try:
-            json_file = os.path.join(self.output_dir, 'tweets.json')
-            if os.path.exists(json_file):
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    self.data['twitter'] = json.load(f)
-                    print(f"加载了 {len(self.data['twitter'])} 条推文")
-        except Exception as e:
-            print(f"加载推文失败: {str(e)}")
+    def render_sections(self, template):
+        """渲染各平台区块，数据未变化的区块直接复用缓存的HTML"""
+        if template is not self.section_cache_template:
+            self.section_cache = {}
+            self.section_cache_template = template
+        
+        sections = {}
+        # 只保留本次用到的区块，避免缓存无限增长
+        section_cache = {}
+        for block_name, key in TEMPLATE_SECTIONS.items():
+            section_data = {key: self.data.get(key, [])}
+            digest = hashlib.sha256(
+                json.dumps(section_data, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')
+            ).hexdigest()
+            cache_key = (block_name, digest)
+            
+            html = self.section_cache.get(cache_key)
+            if html is None:
+                context = template.new_context({'data': section_data})
+                html = ''.join(template.blocks[block_name](context))
+            section_cache[cache_key] = html
+            sections[block_name] = html
+        
+        self.section_cache = section_cache
+        return sections
     
-    def load_bilibili_videos(self):
-        """加载B站视频数据"""
-        try:
-            json_file = os.path.join(self.output_dir, 'bilibili_videos.json')
-            if os.path.exists(json_file):
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    self.data['bilibili'] = json.load(f)
-                    print(f"加载了 {len(self.data['bilibili'])} 个B站视频")
-        except Exception as e:
-            print(f"加载B站视频失败: {str(e)}")
+    def read_updated_at(self, dashboard_file):
+        """读取已生成页面中的更新时间"""
+        if not os.path.exists(dashboard_file):
+            return None
+        with open(dashboard_file, 'r', encoding='utf-8') as f:
+            match = UPDATED_AT_PATTERN.search(f.read())
+        return match.group(1) if match else None
     
     def generate_dashboard(self):
-        """生成仪表板HTML"""
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # 读取模板文件
-        template_path = os.path.join(os.path.dirname(__file__), 'dashboard_template.html')
-        with open(template_path, 'r', encoding='utf-8') as f:
-            template_content = f.read()
-        
-        # 渲染模板
-        template = Template(template_content)
-        html = template.render(
-            current_time=current_time,
-            data=self.data
-        )
+        """生成仪表板HTML，内容未变化的文件不会被重写"""
+        template_path = os.path.join(self.output_dir, 'dashboard_template.html')
+        dashboard_file = os.path.join(self.docs_dir, 'index.html')
+        
+        # 渲染模板（模板文件变化时会自动重新加载）
+        template = self.template_env.get_template('dashboard_template.html')
+        sections = self.render_sections(template)
+        
+        # 先沿用上次的更新时间渲染；只有内容确实变化时才更新时间
+        html = None
+        previous_time = self.read_updated_at(dashboard_file)
+        if previous_time:
+            html = template.render(current_time=previous_time, data=self.data, sections=sections)
+        if html is None or not self.writer.is_text_unchanged(dashboard_file, html):
+            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            html = template.render(current_time=current_time, data=self.data, sections=sections)
         
         # 生成HTML文件到 docs 目录
-        dashboard_file = os.path.join(self.docs_dir, 'index.html')
-        with open(dashboard_file, 'w', encoding='utf-8') as f:
-            f.write(html)
+        self.writer.write_text(dashboard_file, html)
             
         # 复制模板文件到 docs 目录
-        shutil.copy2(template_path, os.path.join(self.docs_dir, 'dashboard_template.html'))
+        self.writer.copy(template_path, os.path.join(self.docs_dir, 'dashboard_template.html'))
         
+        self.writer.report()
         print(f"\n仪表板已生成: {dashboard_file}")
         return dashboard_file
 
 def main():
+    parser = argparse.ArgumentParser(description='运行爬虫并生成仪表板')
+    parser.add_argument('--subprocess', action='store_true',
+                        help='每个爬虫在独立的Python进程中运行')
+    parser.add_argument('--global-limit', type=int, default=GLOBAL_LIMIT,
+                        help='所有平台合计的最大并发抓取数')
+    parser.add_argument('--timeout', type=int, default=SCRAPER_TIMEOUT,
+                        help='子进程模式下单个爬虫的最长运行秒数')
+    args = parser.parse_args()
+    
     # 创建仪表板实例
-    dashboard = Dashboard()
+    dashboard = Dashboard(
+        use_subprocess=args.subprocess,
+        global_limit=args.global_limit,
+        scraper_timeout=args.timeout
+    )
     
-    # 并行运行所有爬虫
+    # 并行运行所有爬虫（进程内模式下结果在抓取完成时直接写入 dashboard.data）
     print("\n=== 第一步：运行爬虫 ===")
     dashboard.run_scrapers()
     
-    # 等待3秒确保文件写入完成
-    print("\n等待文件写入完成...")
-    import time
-    time.sleep(3)
-    
-    # 加载各种数据
-    print("\n=== 第二步：加载数据 ===")
-    dashboard.load_youtube_videos()
-    dashboard.load_twitter_tweets()
-    dashboard.load_bilibili_videos()
+    # 子进程模式下爬虫进程已全部退出，直接读取其保存的文件
+    if dashboard.use_subprocess:
+        print("\n=== 第二步：加载数据 ===")
+        dashboard.load_stored_data()
     
     # 生成仪表板
     print("\n=== 第三步：生成仪表板 ===")
     dashboard_file = dashboard.generate_dashboard()
     
+    if not dashboard.writer.has_changes():
+        print("\n仪表板内容没有变化，无需发布")
+        return
+    
     # 提示用户如何部署
     print("\n=== 如何部署到 GitHub Pages ===")
     print("1. 在 GitHub 上创建一个新的仓库")
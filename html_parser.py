@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""可替换的 HTML 解析后端
+
+按速度从快到慢依次选用 selectolax、lxml（BeautifulSoup 的 'lxml' 解析器）和 Python 自带的 html.parser，
+前两者是可选依赖，没有安装时自动退回到 html.parser。设置环境变量 HTML_PARSER 可以指定后端。
+
+解析结果统一包装为 Element，只提供爬虫用到的几个方法，各后端的解析结果相同。
+"""
+
+import os
+import re
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401  BeautifulSoup(html, 'lxml') 需要
+except ImportError:
+    lxml = None
+
+# 按优先顺序排列的解析后端
+BACKENDS = ('selectolax', 'lxml', 'html.parser')
+
+
+def available_backends():
+    """当前环境中可用的解析后端（按优先顺序）"""
+    installed = {
+        'selectolax': LexborHTMLParser is not None,
+        'lxml': lxml is not None,
+        'html.parser': True,
+    }
+    return [backend for backend in BACKENDS if installed[backend]]
+
+
+def default_backend():
+    """环境变量 HTML_PARSER 指定的后端（需已安装），否则为最快的可用后端"""
+    backends = available_backends()
+    preferred = os.getenv('HTML_PARSER')
+    if preferred in backends:
+        return preferred
+    return backends[0]
+
+
+def element_pattern(tag, class_name):
+    """匹配带有指定 class 的开始标签"""
+    return re.compile(
+        rf'<{tag}\b[^>]*?\bclass\s*=\s*["\'](?:[^"\']*\s)?{re.escape(class_name)}(?=[\s"\'])',
+        re.IGNORECASE
+    )
+
+
+def first_element_html(html, tag, class_name):
+    """截取第一个带有指定 class 的元素：从它的开始标签到下一个同类元素之前
+
+    只解析这一段可以跳过页面头部、导航和其余的条目，片段末尾多出的标签由解析器自行补全。
+    找不到时返回 None。
+    """
+    pattern = element_pattern(tag, class_name)
+    first = pattern.search(html)
+    if not first:
+        return None
+    following = pattern.search(html, first.end())
+    return html[first.start():following.start() if following else len(html)]
+
+
+def read_first_element(chunks, tag, class_name):
+    """从逐块到达的 HTML 文本中截取第一个带有指定 class 的元素（见 first_element_html）
+
+    读到下一个同类元素的开始标签时立即返回，不再读取后面的内容；
+    读完所有内容仍未遇到下一个同类元素时返回从第一个元素开始的所有内容，找不到该元素时返回全部内容。
+    """
+    pattern = element_pattern(tag, class_name)
+    html = ''
+    first = None
+    for chunk in chunks:
+        # 上一块末尾可能是不完整的开始标签，从最后一个 '<' 开始重新查找
+        scan_from = max(html.rfind('<'), 0)
+        html += chunk
+        if first is None:
+            first = pattern.search(html, scan_from)
+            if first is None:
+                continue
+        following = pattern.search(html, max(scan_from, first.end()))
+        if following:
+            return html[first.start():following.start()]
+    return html[first.start():] if first else html
+
+
+class Element:
+    """各解析后端的元素的统一包装"""
+
+    def __init__(self, node, backend):
+        self.node = node
+        self.backend = backend
+
+    def wrap(self, node):
+        return Element(node, self.backend) if node is not None else None
+
+    def find(self, tag, class_name=None):
+        """第一个匹配的子孙元素，没有时返回 None"""
+        if self.backend == 'selectolax':
+            return self.wrap(self.node.css_first(f'{tag}.{class_name}' if class_name else tag))
+        return self.wrap(self.node.find(tag, class_=class_name) if class_name else self.node.find(tag))
+
+    def find_all(self, tag, class_name=None):
+        if self.backend == 'selectolax':
+            nodes = self.node.css(f'{tag}.{class_name}' if class_name else tag)
+        else:
+            nodes = self.node.find_all(tag, class_=class_name) if class_name else self.node.find_all(tag)
+        return [Element(node, self.backend) for node in nodes]
+
+    def get(self, name, default=None):
+        """属性值"""
+        if self.backend == 'selectolax':
+            value = self.node.attributes.get(name)
+            return default if value is None else value
+        return self.node.get(name, default)
+
+    def classes(self):
+        if self.backend == 'selectolax':
+            return (self.node.attributes.get('class') or '').split()
+        return self.node.get('class', [])
+
+    def text(self):
+        """去掉每段文字首尾空白后拼接的文本（与 BeautifulSoup 的 get_text(strip=True) 相同）"""
+        if self.backend == 'selectolax':
+            return self.node.text(strip=True)
+        return self.node.get_text(strip=True)
+
+
+def parse_html(html, backend=None):
+    """用指定后端（默认为 default_backend()）解析 HTML，返回根元素"""
+    backend = backend or default_backend()
+    if backend == 'selectolax':
+        return Element(LexborHTMLParser(html).root, backend)
+    return Element(BeautifulSoup(html, backend), backend)
+
+
+def parse_first_element(html, tag, class_name, backend=None):
+    """只解析第一个带有指定 class 的元素并返回它，没有时返回 None
+
+    页面中找不到该元素的开始标签时（例如属性写法特殊）退回到解析整个页面。
+    """
+    fragment = first_element_html(html, tag, class_name)
+    return parse_html(html if fragment is None else fragment, backend).find(tag, class_name)
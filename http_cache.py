@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import timedelta
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from http_cassette import DROPPED_HEADERS, active_cassette
+
+# 所有爬虫进程共用的响应缓存
+DEFAULT_CACHE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'http_cache.db')
+
+# 缓存总大小上限（字节），超出后按最近访问时间淘汰
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+# 缓存规则：(主机, 路径前缀, 有效期秒数)，只缓存匹配规则的 GET 请求
+CACHE_RULES = [
+    ('api.bilibili.com', '/x/space/acc/info', 24 * 3600),      # B站用户信息
+    ('api.twitter.com', '/2/users/by/username/', 7 * 24 * 3600),  # Twitter 用户名 -> 用户ID
+    ('www.youtube.com', '/', 30 * 60),                          # yt-dlp 频道页
+]
+
+# 参与缓存键计算的请求头（不同的登录状态、语言得到不同的缓存）
+VARY_HEADERS = ('Accept', 'Accept-Language', 'Authorization', 'Cookie')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access);
+"""
+
+
+def ttl_for(url):
+    """按缓存规则返回URL的有效期，不缓存时返回 None"""
+    parsed = urlparse(url)
+    for host, prefix, ttl in CACHE_RULES:
+        if parsed.netloc == host and parsed.path.startswith(prefix):
+            return ttl
+    return None
+
+
+def cache_key(method, url, headers=None):
+    """缓存键：方法 + URL + 参与缓存键的请求头"""
+    headers = headers or {}
+    vary = '\n'.join(f"{name}:{headers.get(name, '')}" for name in VARY_HEADERS)
+    return hashlib.sha256(f"{method.upper()} {url}\n{vary}".encode('utf-8')).hexdigest()
+
+
+class HTTPCache:
+    """SQLite 响应缓存：多个进程可同时读写（WAL 模式），超出大小上限时淘汰最久未访问的响应"""
+
+    def __init__(self, path=DEFAULT_CACHE_DB, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def get(self, key):
+        """返回未过期的缓存 (状态码, 响应头, 响应体)，没有时返回 None"""
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                'SELECT status, headers, body FROM responses WHERE key = ? AND expires > ?', (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+        return row[0], json.loads(row[1]), bytes(row[2])
+
+    def put(self, key, url, status, headers, body, ttl):
+        """保存响应，并在超出大小上限时淘汰"""
+        now = time.time()
+        headers = {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS}
+        with self.lock, self.conn:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO responses (key, url, status, headers, body, size, expires, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (key, url, status, json.dumps(headers), body, len(body), now + ttl, now))
+            self.evict(now)
+
+    def evict(self, now):
+        """删除过期的响应，再按最近访问时间从旧到新删除直到不超过大小上限（调用方需持有 lock）"""
+        self.conn.execute('DELETE FROM responses WHERE expires <= ?', (now,))
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        stale_keys = []
+        for key, size in self.conn.execute('SELECT key, size FROM responses ORDER BY last_access'):
+            if total - freed <= self.max_bytes:
+                break
+            stale_keys.append((key,))
+            freed += size
+        self.conn.executemany('DELETE FROM responses WHERE key = ?', stale_keys)
+
+    def get_json(self, url):
+        """读取缓存的 JSON 数据（用于 yt-dlp 等不经过 requests 的客户端）"""
+        cached = self.get(cache_key('GET', url))
+        return json.loads(cached[2]) if cached else None
+
+    def put_json(self, url, data):
+        """按缓存规则保存 JSON 数据，URL 不匹配任何规则时不保存"""
+        ttl = ttl_for(url)
+        if ttl:
+            body = json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+            self.put(cache_key('GET', url), url, 200, {'Content-Type': 'application/json'}, body, ttl)
+
+    def mount(self, session):
+        """为 requests.Session 加上缓存（包装已挂载的适配器，可与录制/回放同时使用）
+
+        回放录制文件时不使用缓存，保证回放结果只来自录制文件。
+        """
+        if active_cassette():
+            return session
+        for prefix, adapter in list(session.adapters.items()):
+            session.mount(prefix, CacheAdapter(self, adapter))
+        return session
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class CacheAdapter(HTTPAdapter):
+    """requests 传输层：匹配缓存规则的 GET 请求优先使用缓存，只缓存状态码为 200 的响应"""
+
+    def __init__(self, cache, adapter, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.adapter = adapter
+
+    def send(self, request, **kwargs):
+        ttl = ttl_for(request.url) if request.method == 'GET' else None
+        if not ttl:
+            return self.adapter.send(request, **kwargs)
+
+        key = cache_key(request.method, request.url, request.headers)
+        cached = self.cache.get(key)
+        if cached:
+            return self.build_response(request, *cached)
+
+        response = self.adapter.send(request, **kwargs)
+        if response.status_code == 200 and not kwargs.get('stream'):
+            self.cache.put(key, request.url, response.status_code, response.headers, response.content, ttl)
+        return response
+
+    def build_response(self, request, status, headers, body):
+        response = requests.Response()
+        response.status_code = status
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(headers)
+        response.headers['Content-Length'] = str(len(body))
+        response.headers['X-Cache'] = 'HIT'
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = timedelta(0)
+        response.raw = io.BytesIO(body)
+        response._content = body
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache():
+    """进程内共用的响应缓存"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HTTPCache()
+        return _cache
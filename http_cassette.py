@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import sys
+import json
+import base64
+import random
+import hashlib
+import argparse
+import runpy
+import threading
+from datetime import timedelta
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+import metrics
+
+# 默认录制文件：与 requests.jsonl 相同的 JSONL 格式，每行一个 JSON 对象（请求 + 响应）；
+# 单独放在 cassettes 目录，录制时不会追加到仓库根目录已有的 requests.jsonl 中
+DEFAULT_CASSETTE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cassettes', 'http_cassette.jsonl')
+
+# 回放时不保留的响应头（录制的是解压后的内容）
+DROPPED_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length')
+
+_active_cassette = None
+
+
+def request_key(method, url, body):
+    """请求的匹配键：方法 + URL + 请求体哈希"""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    digest = hashlib.sha256(body or b'').hexdigest()[:16]
+    return f"{method.upper()} {url} {digest}"
+
+
+class Cassette:
+    """HTTP 录制/回放文件（JSONL 格式）"""
+
+    def __init__(self, path=DEFAULT_CASSETTE, mode='replay'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"未知的录制模式: {mode}")
+        self.path = path
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.entries = {}
+        if mode == 'replay':
+            self.load()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def load(self):
+        """加载录制文件，相同请求按录制顺序依次回放"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    self.entries.setdefault(entry['key'], []).append(entry)
+        print(f"已加载 {sum(len(v) for v in self.entries.values())} 条录制请求: {self.path}")
+
+    def append(self, entry):
+        """追加一条录制记录"""
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def lookup(self, key):
+        """查找录制的响应，同一请求的最后一条记录可重复使用"""
+        with self.lock:
+            entries = self.entries.get(key)
+            if not entries:
+                return None
+            return entries.pop(0) if len(entries) > 1 else entries[0]
+
+    def record(self, method, url, request_body, status, reason, headers, body):
+        """录制一次请求和响应"""
+        entry = {
+            'key': request_key(method, url, request_body),
+            'method': method.upper(),
+            'url': url,
+            'status': status,
+            'reason': reason,
+            'headers': {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS},
+        }
+        try:
+            entry['body'] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            entry['body_base64'] = base64.b64encode(body).decode('ascii')
+        self.append(entry)
+
+    @staticmethod
+    def entry_body(entry):
+        """取出录制的响应体（字节）"""
+        if 'body_base64' in entry:
+            return base64.b64decode(entry['body_base64'])
+        return entry.get('body', '').encode('utf-8')
+
+    def mount(self, session):
+        """为 requests.Session 挂载录制/回放适配器（包装所有已挂载的适配器，包括按主机挂载的）
+
+        录制时请求仍经过原来的适配器（超时、重试、限速），回放时直接返回录制内容。
+        """
+        for prefix, adapter in list(session.adapters.items()):
+            if not isinstance(adapter, CassetteAdapter):
+                session.mount(prefix, CassetteAdapter(self, adapter))
+        return session
+
+    async def route_context(self, context):
+        """为 Playwright 浏览器上下文添加录制/回放路由"""
+        async def handle(route):
+            request = route.request
+            key = request_key(request.method, request.url, request.post_data_buffer)
+            if self.mode == 'replay':
+                entry = self.lookup(key)
+                if entry is None:
+                    await route.abort()
+                    return
+                await route.fulfill(status=entry['status'], headers=entry['headers'], body=self.entry_body(entry))
+            else:
+                response = await route.fetch()
+                body = await response.body()
+                self.record(request.method, request.url, request.post_data_buffer,
+                            response.status, response.status_text, response.headers, body)
+                await route.fulfill(response=response, body=body)
+        await context.route('**/*', handle)
+        return context
+
+
+class CassetteAdapter(HTTPAdapter):
+    """requests 传输层：录制模式下通过被包装的适配器发送并记录真实响应，回放模式下直接返回录制内容"""
+
+    def __init__(self, cassette, adapter=None, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.adapter = adapter
+
+    def send(self, request, **kwargs):
+        if self.cassette.mode == 'record':
+            if self.adapter is not None:
+                response = self.adapter.send(request, **kwargs)
+            else:
+                response = super().send(request, **kwargs)
+            body = response.content
+            self.cassette.record(request.method, request.url, request.body,
+                                 response.status_code, response.reason, response.headers, body)
+            return response
+
+        entry = self.cassette.lookup(request_key(request.method, request.url, request.body))
+        if entry is None:
+            raise requests.ConnectionError(f"录制文件中没有该请求: {request.method} {request.url}", request=request)
+
+        body = self.cassette.entry_body(entry)
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry.get('reason')
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.headers['Content-Length'] = str(len(body))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = timedelta(0)
+        response.raw = io.BytesIO(body)
+        response._content = body
+        response._content_consumed = True
+        return response
+
+
+def active_cassette():
+    """返回当前进程安装的录制文件（未安装时返回 None）"""
+    return _active_cassette
+
+
+def install(path=DEFAULT_CASSETTE, mode='replay'):
+    """为当前进程中创建的所有 requests.Session（包括 requests.get 等）启用录制/回放"""
+    global _active_cassette
+    cassette = Cassette(path, mode)
+    original_init = requests.Session.__init__
+
+    def session_init(session, *args, **kwargs):
+        original_init(session, *args, **kwargs)
+        cassette.mount(session)
+
+    requests.Session.__init__ = session_init
+    _active_cassette = cassette
+
+    # 回放时无需等待，主动延迟只计入统计
+    if mode == 'replay':
+        metrics.disable_delays()
+    return cassette
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='在录制/回放模式下运行爬虫脚本',
+        usage='%(prog)s [--cassette PATH] [--seed N] {record,replay} script [args ...]'
+    )
+    parser.add_argument('mode', choices=['record', 'replay'], help='record: 录制真实请求; replay: 离线回放')
+    parser.add_argument('script', help='要运行的脚本，例如 x_scraper.py')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help='传给脚本的参数')
+    parser.add_argument('--cassette', default=DEFAULT_CASSETTE, help='录制文件路径（JSONL）')
+    parser.add_argument('--seed', type=int, default=0, help='随机数种子，保证录制和回放的请求顺序一致')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    # 以脚本方式运行时本模块是 __main__，爬虫导入的是另一个 http_cassette 模块，
+    # 必须在那个模块中安装，active_cassette() 才能看到录制文件
+    import http_cassette
+    http_cassette.install(args.cassette, args.mode)
+
+    script_path = os.path.abspath(args.script)
+    sys.argv = [script_path] + args.args
+    sys.path.insert(0, os.path.dirname(script_path))
+    runpy.run_path(script_path, run_name='__main__')
+
+
+if __name__ == '__main__':
+    main()
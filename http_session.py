@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import codecs
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+from http_cassette import active_cassette
+from http_cache import get_http_cache
+from rate_limiter import get_rate_limiter, parse_retry_after, host_of, BODY_LIMITED_HOSTS
+
+# 默认超时：(连接, 读取) 秒，调用时显式传入 timeout 会覆盖
+DEFAULT_TIMEOUT = (5, 20)
+
+# 每个主机保持的连接数上限（与 pipeline.PLATFORM_LIMITS 中的并发数一致或略大）
+DEFAULT_POOL_SIZE = 10
+HOST_POOL_SIZES = {
+    'api.bilibili.com': 4,
+    'api.github.com': 2,
+    'api.twitter.com': 4,
+    'api.newrank.cn': 2,
+}
+
+# 连接失败和网关错误时自动重试（只重试幂等请求，最终仍失败时返回最后一次响应）
+DEFAULT_RETRIES = 3
+RETRY_STATUS = (502, 503, 504)
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+# 流式读取响应时每次读取的字节数
+STREAM_CHUNK_SIZE = 8 * 1024
+
+# 收到 429 后，等限速器的暂停结束再重发的次数（429 不交给 urllib3 重试，以便所有请求一起暂停）
+RATE_LIMIT_RETRIES = 2
+
+
+def create_retry(total=DEFAULT_RETRIES):
+    if not total:
+        return Retry(total=0, read=False, redirect=5, raise_on_status=False)
+    return Retry(
+        total=total,
+        backoff_factor=0.5,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=IDEMPOTENT_METHODS,
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    )
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """带默认超时的连接池适配器；传入 limiter 时按主机限速，收到 429 时暂停该主机"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, limiter=None, sleep=None, **kwargs):
+        self.timeout = timeout
+        self.limiter = limiter
+        self.sleep = sleep
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        if not self.limiter:
+            return super().send(request, **kwargs)
+
+        retries = RATE_LIMIT_RETRIES if request.method in IDEMPOTENT_METHODS else 0
+        for attempt in range(retries + 1):
+            self.limiter.acquire(request.url, sleep=self.sleep)
+            response = super().send(request, **kwargs)
+            if response.status_code != 429:
+                break
+            self.limiter.backoff(request.url, parse_retry_after(response.headers.get('Retry-After')))
+            if attempt < retries:
+                response.close()
+        # 限流通过响应内容表示的主机，2xx 不代表成功，由调用方确认后重置
+        if response.status_code < 400 and host_of(request.url) not in BODY_LIMITED_HOSTS:
+            self.limiter.record_success(request.url)
+        return response
+
+
+def iter_text(response, chunk_size=STREAM_CHUNK_SIZE, metrics=None):
+    """逐块返回流式响应（stream=True）解码后的文本，响应没有声明编码时按 UTF-8 解码
+
+    调用方读到需要的内容后可以停止读取并关闭响应，剩余的响应体不再下载。
+    传入 metrics 时按实际读取的字节数记录（未读取的部分不计入）。
+    """
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if metrics:
+            metrics.record_bytes(response.url, len(chunk))
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def create_session(headers=None, metrics=None, cache=False, retries=DEFAULT_RETRIES, timeout=DEFAULT_TIMEOUT,
+                   rate_limit=True):
+    """创建 HTTP 会话：保持连接、按主机设置连接池大小、自动重试、默认超时、gzip/br 压缩、按主机限速
+
+    参数:
+        headers: 会话的默认请求头
+        metrics: 传入 metrics.get_metrics() 的结果时自动记录每个响应
+        cache: 为 True 时使用共享的响应缓存（见 http_cache.CACHE_RULES）
+        retries: 连接失败和网关错误的重试次数，0 表示不重试
+        rate_limit: 为 True 时使用共享的按主机限速器（见 rate_limiter.HOST_RATES），
+                    限速等待计入 metrics 的等待时间
+    """
+    session = requests.Session()
+    session.headers['Accept-Encoding'] = DEFAULT_ACCEPT_ENCODING
+    session.headers['Connection'] = 'keep-alive'
+    if headers:
+        session.headers.update(headers)
+
+    retry = create_retry(retries)
+    limiter = get_rate_limiter() if rate_limit else None
+    sleep = metrics.sleep if metrics else None
+    default_adapter = TimeoutHTTPAdapter(
+        timeout=timeout, limiter=limiter, sleep=sleep,
+        pool_connections=DEFAULT_POOL_SIZE, pool_maxsize=DEFAULT_POOL_SIZE, max_retries=retry
+    )
+    session.mount('http://', default_adapter)
+    session.mount('https://', default_adapter)
+    for host, pool_size in HOST_POOL_SIZES.items():
+        session.mount(f'https://{host}/', TimeoutHTTPAdapter(
+            timeout=timeout, limiter=limiter, sleep=sleep,
+            pool_connections=1, pool_maxsize=pool_size, max_retries=retry
+        ))
+
+    cassette = active_cassette()
+    if cassette:
+        # 录制/回放时所有请求都经过录制文件的适配器；录制时仍使用上面的超时、重试和限速，回放时直接返回录制内容
+        cassette.mount(session)
+    if cache:
+        get_http_cache().mount(session)
+    if metrics:
+        metrics.track_session(session)
+    return session
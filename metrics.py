@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+
+# 运行报告默认保存在数据文件所在目录
+REPORT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 为 False 时主动等待只计入统计，不实际等待（离线回放时使用）
+_delays_enabled = True
+
+
+def disable_delays():
+    """关闭主动等待"""
+    global _delays_enabled
+    _delays_enabled = False
+
+
+def delay(seconds):
+    """主动等待（不计入任何爬虫的统计），关闭主动等待时直接返回"""
+    if _delays_enabled:
+        time.sleep(seconds)
+
+
+class RunMetrics:
+    """单个爬虫一次运行的性能数据：耗时、每个主机的请求数和字节数、重试和对冲请求次数、主动等待时间"""
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空数据，开始新的一轮统计"""
+        self.first_start = None
+        self.last_end = None
+        self.busy_seconds = 0.0
+        self.tasks = 0
+        self.hosts = {}
+        self.retries = 0
+        self.hedges = 0
+        self.sleep_seconds = 0.0
+
+    @contextmanager
+    def track(self):
+        """记录一次抓取任务的耗时"""
+        start = time.time()
+        with self.lock:
+            if self.first_start is None:
+                self.first_start = start
+        try:
+            yield self
+        finally:
+            end = time.time()
+            with self.lock:
+                self.tasks += 1
+                self.busy_seconds += end - start
+                self.last_end = max(self.last_end or end, end)
+
+    def record_request(self, url, nbytes=0, elapsed=0.0, ok=True):
+        """记录一次HTTP请求"""
+        host = urlparse(url).netloc or url
+        with self.lock:
+            stats = self.hosts.setdefault(host, {'requests': 0, 'errors': 0, 'bytes': 0, 'seconds': 0.0})
+            stats['requests'] += 1
+            stats['bytes'] += nbytes
+            stats['seconds'] += elapsed
+            if not ok:
+                stats['errors'] += 1
+
+    def record_bytes(self, url, nbytes):
+        """记录流式响应实际读取的字节数（不增加请求数）"""
+        host = urlparse(url).netloc or url
+        with self.lock:
+            stats = self.hosts.setdefault(host, {'requests': 0, 'errors': 0, 'bytes': 0, 'seconds': 0.0})
+            stats['bytes'] += nbytes
+
+    def record_response(self, response, stream=False):
+        """根据 requests 的响应记录一次请求
+
+        流式响应此时还没有读取响应体，字节数由读取方按实际读取的内容调用 record_bytes 记录（见 http_session.iter_text）。
+        """
+        self.record_request(
+            response.url,
+            nbytes=0 if stream else len(response.content),
+            elapsed=response.elapsed.total_seconds(),
+            ok=response.ok
+        )
+
+    def track_session(self, session):
+        """为 requests.Session 添加钩子，自动记录每个响应"""
+        def hook(response, *args, **kwargs):
+            self.record_response(response, stream=kwargs.get('stream', False))
+        session.hooks['response'].append(hook)
+        return session
+
+    def track_browser_context(self, context):
+        """记录 Playwright 浏览器上下文中的每个响应"""
+        def on_response(response):
+            nbytes = int(response.headers.get('content-length') or 0)
+            self.record_request(response.url, nbytes=nbytes, ok=response.ok)
+        context.on('response', on_response)
+        return context
+
+    def record_retry(self, count=1):
+        """记录重试次数"""
+        with self.lock:
+            self.retries += count
+
+    def record_hedge(self, count=1):
+        """记录对冲请求次数（前一个请求尚未失败时提前发出的请求）"""
+        with self.lock:
+            self.hedges += count
+
+    def sleep(self, seconds):
+        """主动等待（计入等待时间）"""
+        with self.lock:
+            self.sleep_seconds += seconds
+        if _delays_enabled:
+            time.sleep(seconds)
+
+    async def async_sleep(self, seconds):
+        """异步主动等待（计入等待时间）"""
+        with self.lock:
+            self.sleep_seconds += seconds
+        if _delays_enabled:
+            await asyncio.sleep(seconds)
+
+    def to_dict(self):
+        """转换为可保存的字典"""
+        with self.lock:
+            wall_seconds = (self.last_end - self.first_start) if self.first_start and self.last_end else 0.0
+            return {
+                'name': self.name,
+                'started': datetime.fromtimestamp(self.first_start).strftime('%Y-%m-%d %H:%M:%S') if self.first_start else None,
+                'wall_seconds': round(wall_seconds, 3),
+                'busy_seconds': round(self.busy_seconds, 3),
+                'tasks': self.tasks,
+                'requests': sum(stats['requests'] for stats in self.hosts.values()),
+                'bytes_received': sum(stats['bytes'] for stats in self.hosts.values()),
+                'retries': self.retries,
+                'hedges': self.hedges,
+                'sleep_seconds': round(self.sleep_seconds, 3),
+                'hosts': {host: dict(stats, seconds=round(stats['seconds'], 3)) for host, stats in self.hosts.items()},
+            }
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def get_metrics(name):
+    """获取（或创建）指定爬虫的性能数据对象"""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = RunMetrics(name)
+        return _registry[name]
+
+
+def reset_metrics(names=None):
+    """清空性能数据，开始新的一轮统计（爬虫模块持有的对象保持不变）"""
+    with _registry_lock:
+        selected = [metrics for name, metrics in _registry.items() if names is None or name in names]
+    for metrics in selected:
+        with metrics.lock:
+            metrics.reset()
+
+
+def write_report(filename='run_report.json', names=None):
+    """将性能数据保存为JSON运行报告，返回文件路径"""
+    with _registry_lock:
+        selected = [metrics for name, metrics in _registry.items() if names is None or name in names]
+    report = {
+        'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'scrapers': {metrics.name: metrics.to_dict() for metrics in selected},
+    }
+    report_file = os.path.join(REPORT_DIR, filename)
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n运行报告已保存到: {report_file}")
+    return report_file
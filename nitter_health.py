@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import threading
+
+# Nitter 实例的健康记录（跨运行保存）
+DEFAULT_HEALTH_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nitter_health.json')
+
+# 计算延迟中位数时保留的最近请求数
+LATENCY_WINDOW = 20
+
+# 没有延迟记录的实例按这个延迟（秒）估计
+DEFAULT_LATENCY = 2.0
+
+# 连续失败 FAILURE_THRESHOLD 次后熔断：COOLDOWN_BASE 秒内不再尝试，每次重新熔断时冷却时间翻倍，最多 COOLDOWN_MAX
+FAILURE_THRESHOLD = 3
+COOLDOWN_BASE = 10 * 60
+COOLDOWN_MAX = 24 * 3600
+
+
+def median(values):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+class InstanceHealth:
+    """Nitter 实例健康表：成功率、延迟中位数、最近失败时间和熔断状态"""
+
+    def __init__(self, path=DEFAULT_HEALTH_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.instances = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.instances = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"读取实例健康记录失败，将重新统计: {str(e)}")
+            self.instances = {}
+
+    def save(self):
+        """原子写入健康记录"""
+        with self.lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.instances, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def state(self, instance):
+        """实例的健康记录（调用方需持有 lock）"""
+        return self.instances.setdefault(instance, {
+            'successes': 0,
+            'failures': 0,
+            'consecutive_failures': 0,
+            'trips': 0,
+            'latencies': [],
+            'last_failure': None,
+            'last_error': None,
+            'open_until': 0,
+        })
+
+    def success_rate(self, state):
+        """平滑后的成功率，没有记录的实例为 0.5"""
+        return (state['successes'] + 1) / (state['successes'] + state['failures'] + 2)
+
+    def p50_latency(self, state):
+        return median(state['latencies']) or DEFAULT_LATENCY
+
+    def score(self, state):
+        """越大越好：成功率高、延迟低的实例优先"""
+        return self.success_rate(state) / (1 + self.p50_latency(state))
+
+    def is_open(self, state, now):
+        """熔断中（冷却时间未过）"""
+        return state['open_until'] > now
+
+    def ranked(self, instances, now=None):
+        """按健康程度从好到差排列可用的实例，跳过熔断中的实例
+
+        所有实例都在熔断中时，返回最早结束冷却的一个用于试探。
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            states = {instance: self.state(instance) for instance in instances}
+            available = [instance for instance in instances if not self.is_open(states[instance], now)]
+            if not available and instances:
+                return [min(instances, key=lambda instance: states[instance]['open_until'])]
+            return sorted(available, key=lambda instance: self.score(states[instance]), reverse=True)
+
+    def record_success(self, instance, latency):
+        with self.lock:
+            state = self.state(instance)
+            state['successes'] += 1
+            state['consecutive_failures'] = 0
+            state['trips'] = 0
+            state['open_until'] = 0
+            state['latencies'] = (state['latencies'] + [round(latency, 3)])[-LATENCY_WINDOW:]
+
+    def record_failure(self, instance, error, now=None):
+        """记录一次失败，连续失败达到阈值时熔断，返回熔断的冷却秒数（未熔断时为 0）"""
+        now = time.time() if now is None else now
+        with self.lock:
+            state = self.state(instance)
+            state['failures'] += 1
+            state['consecutive_failures'] += 1
+            state['last_failure'] = now
+            state['last_error'] = str(error)[:200]
+            if state['consecutive_failures'] < FAILURE_THRESHOLD:
+                return 0
+            # 冷却结束后的试探请求再次失败时立即重新熔断
+            state['trips'] += 1
+            state['consecutive_failures'] = FAILURE_THRESHOLD - 1
+            cooldown = min(COOLDOWN_MAX, COOLDOWN_BASE * 2 ** (state['trips'] - 1))
+            state['open_until'] = now + cooldown
+            return cooldown
+
+    def summary(self, instances):
+        """各实例的健康概况（用于日志）"""
+        now = time.time()
+        with self.lock:
+            lines = []
+            for instance in instances:
+                state = self.state(instance)
+                status = '熔断中' if self.is_open(state, now) else '可用'
+                lines.append(
+                    f"{instance}: {status} 成功率 {self.success_rate(state):.0%} "
+                    f"延迟中位数 {self.p50_latency(state):.2f}s"
+                )
+            return lines
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import hashlib
+import shutil
+
+
+def file_digest(path):
+    """计算文件内容的 sha256，文件不存在时返回 None"""
+    if not os.path.exists(path):
+        return None
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class OutputWriter:
+    """只在内容变化时写入或复制文件，并记录每个文件是否变化"""
+
+    def __init__(self):
+        self.changes = {}
+
+    def is_unchanged(self, path, data):
+        """磁盘上的文件内容是否与 data 完全一致"""
+        if not os.path.exists(path) or os.path.getsize(path) != len(data):
+            return False
+        return file_digest(path) == hashlib.sha256(data).hexdigest()
+
+    def write_bytes(self, path, data):
+        """写入字节内容，内容未变化时跳过，返回是否写入"""
+        changed = not self.is_unchanged(path, data)
+        if changed:
+            # 先写临时文件再替换，避免发布过程中读到写了一半的文件
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self.changes[path] = changed
+        return changed
+
+    def encode_text(self, text, encoding='utf-8'):
+        """按文本模式写入的方式编码（换行符转换为系统换行符）"""
+        if os.linesep != '\n':
+            text = text.replace('\n', os.linesep)
+        return text.encode(encoding)
+
+    def is_text_unchanged(self, path, text, encoding='utf-8'):
+        """磁盘上的文件内容是否与文本 text 完全一致"""
+        return self.is_unchanged(path, self.encode_text(text, encoding))
+
+    def write_text(self, path, text, encoding='utf-8'):
+        """写入文本内容，内容未变化时跳过，返回是否写入"""
+        return self.write_bytes(path, self.encode_text(text, encoding))
+
+    def copy(self, source, target):
+        """复制文件，目标内容一致时跳过，返回是否复制"""
+        changed = file_digest(source) != file_digest(target)
+        if changed:
+            shutil.copy2(source, target)
+        self.changes[target] = changed
+        return changed
+
+    def has_changes(self):
+        """是否有任何文件发生变化"""
+        return any(self.changes.values())
+
+    def report(self):
+        """打印每个文件的变化情况"""
+        for path, changed in self.changes.items():
+            status = '已更新' if changed else '未变化'
+            print(f"{status}: {path}")
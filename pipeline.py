@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import importlib
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from metrics import get_metrics, reset_metrics, write_report
+from content_store import get_store
+
+# 每个平台同时进行的抓取任务数上限
+PLATFORM_LIMITS = {
+    'youtube': 4,
+    'x': 4,          # 与 x_scraper.USER_WORKERS 一致
+    'bilibili': 1,   # B站风控严格，串行请求
+    'twitter': 2,
+    'wechat': 1,
+    'xiaohongshu': 2,
+    'podcast': 2,
+}
+
+# 所有平台合计同时进行的抓取任务数上限
+GLOBAL_LIMIT = 8
+
+
+class PlatformSource(ABC):
+    """平台数据源：列出作者、抓取单个作者、保存结果（子类必须实现 fetch）"""
+    module_name = None
+    # 内容的 time 字段为 UTC 时间（否则按本地时间解释）
+    utc_times = False
+
+    def __init__(self):
+        self.module = importlib.import_module(self.module_name)
+
+    async def setup(self):
+        """抓取开始前的初始化（如启动浏览器）"""
+
+    async def close(self):
+        """抓取结束后的清理"""
+
+    def authors(self):
+        """返回需要抓取的作者列表"""
+        return []
+
+    @abstractmethod
+    async def fetch(self, author):
+        """抓取单个作者的最新内容，返回内容列表"""
+
+    def save(self, items):
+        """保存该平台的抓取结果（内容库、HTML文件）"""
+
+    def published_at(self, item):
+        """内容的发布时间戳（秒），无法确定时返回 None"""
+        try:
+            published = datetime.strptime(item['time'], '%Y-%m-%d %H:%M:%S')
+        except (KeyError, TypeError, ValueError):
+            return None
+        if self.utc_times:
+            published = published.replace(tzinfo=timezone.utc)
+        return published.timestamp()
+
+
+class YouTubeSource(PlatformSource):
+    module_name = 'youtube_scraper'
+
+    def authors(self):
+        return list(self.module.CHANNELS)
+
+    async def fetch(self, author):
+        return await asyncio.to_thread(self.module.get_youtube_videos, author) or []
+
+    def save(self, items):
+        self.module.generate_html(items)
+        self.module.save_videos(items)
+
+
+class XSource(PlatformSource):
+    module_name = 'x_scraper'
+    # Nitter 页面和 RSS 中的推文时间都是 UTC
+    utc_times = True
+
+    async def setup(self):
+        self.scraper = self.module.XScraper()
+
+    async def close(self):
+        self.scraper.close()
+
+    def authors(self):
+        return list(self.module.USERNAMES)
+
+    async def fetch(self, author):
+        tweet = await asyncio.to_thread(self.scraper.get_user_latest_tweet, author)
+        return self.module.serialize_tweets([tweet]) if tweet else []
+
+    def save(self, items):
+        self.module.save_tweets(items)
+
+
+class BilibiliSource(PlatformSource):
+    module_name = 'bilibili_scraper'
+
+    def authors(self):
+        return list(self.module.USERS)
+
+    async def fetch(self, author):
+        video = await asyncio.to_thread(self.module.get_user_latest_video, author)
+        return [video] if video else []
+
+    def save(self, items):
+        self.module.generate_html(items)
+        self.module.save_videos(items)
+
+
+class TwitterSource(PlatformSource):
+    module_name = 'twitter_scraper'
+
+    async def setup(self):
+        self.module.load_dotenv()
+        self.scraper = self.module.TwitterScraper()
+
+    def authors(self):
+        # 未配置 TWITTER_BEARER_TOKEN 时跳过该平台
+        if not self.scraper.bearer_token:
+            print("未配置TWITTER_BEARER_TOKEN，跳过Twitter")
+            return []
+        return list(self.module.USERNAMES)
+
+    async def fetch(self, author):
+        return await asyncio.to_thread(self.scraper.get_latest_tweets, author)
+
+    def save(self, items):
+        self.scraper.save_tweets(items)
+        self.scraper.generate_html(items)
+
+    def published_at(self, item):
+        try:
+            return datetime.fromisoformat(item['created_at'].replace('Z', '+00:00')).timestamp()
+        except (KeyError, AttributeError, ValueError):
+            return None
+
+
+class WeChatSource(PlatformSource):
+    module_name = 'wechat_scraper'
+
+    async def setup(self):
+        self.scraper = self.module.WeChatScraper()
+
+    def authors(self):
+        return list(self.module.ACCOUNTS)
+
+    async def fetch(self, author):
+        return await asyncio.to_thread(self.scraper.get_latest_articles, author, save_html=False) or []
+
+    def save(self, items):
+        get_store().upsert_items('wechat', items)
+
+
+class BrowserSource(PlatformSource):
+    """基于 Playwright 的数据源，所有作者共享一个浏览器，每个任务使用独立页面"""
+    scraper_class = None
+
+    async def setup(self):
+        self.scraper = getattr(self.module, self.scraper_class)()
+        await self.scraper.setup_browser()
+
+    async def close(self):
+        if hasattr(self.scraper, 'browser'):
+            await self.scraper.browser.close()
+        if hasattr(self.scraper, 'playwright'):
+            await self.scraper.playwright.stop()
+
+    async def fetch(self, author):
+        page = await self.scraper.context.new_page()
+        page.set_default_timeout(60000)
+        try:
+            return await self.fetch_page(author, page)
+        finally:
+            await page.close()
+
+    @abstractmethod
+    async def fetch_page(self, author, page):
+        """在浏览器页面中抓取单个作者的最新内容，返回内容列表"""
+
+
+class XiaohongshuSource(BrowserSource):
+    module_name = 'xiaohongshu_scraper'
+    scraper_class = 'XiaohongshuScraper'
+
+    def authors(self):
+        return self.module.get_configured_users()
+
+    async def fetch_page(self, author, page):
+        return await self.scraper.get_user_videos(author, page)
+
+    def save(self, items):
+        self.scraper.save_videos(items)
+        self.scraper.generate_html(items)
+
+
+class PodcastSource(BrowserSource):
+    module_name = 'podcast_scraper'
+    scraper_class = 'PodcastScraper'
+
+    def authors(self):
+        return list(self.module.PODCASTS)
+
+    async def fetch_page(self, author, page):
+        return await self.scraper.get_podcast_episodes(author, page)
+
+    def save(self, items):
+        self.scraper.save_episodes(items)
+        self.scraper.generate_html(items)
+
+
+SOURCES = {
+    'youtube': YouTubeSource,
+    'x': XSource,
+    'bilibili': BilibiliSource,
+    'twitter': TwitterSource,
+    'wechat': WeChatSource,
+    'xiaohongshu': XiaohongshuSource,
+    'podcast': PodcastSource,
+}
+
+
+class ScraperPipeline:
+    """异步抓取流水线：每个平台的每个作者都是一个独立任务，受平台和全局并发上限约束"""
+
+    def __init__(self, platforms=None, platform_limits=None, global_limit=GLOBAL_LIMIT,
+                 executor=None, keep_sources=False, report_file='run_report.json', planner=None):
+        self.platforms = list(platforms or SOURCES)
+        self.platform_limits = dict(PLATFORM_LIMITS)
+        self.platform_limits.update(platform_limits or {})
+        self.global_limit = global_limit
+        # 外部传入的线程池由调用方负责关闭（常驻进程中多个流水线共用）
+        self.executor = executor
+        # 为 True 时数据源（会话、浏览器）在多次运行之间保持打开，需要调用 close() 关闭
+        self.keep_sources = keep_sources
+        self.sources = {}
+        self.report_file = report_file
+        # 自适应抓取计划（polling_planner.PollingPlanner），为 None 时每轮抓取所有作者
+        self.planner = planner
+        # 多个流水线同时运行时共用的全局并发上限（asyncio.Semaphore），为 None 时每轮新建
+        self.shared_global_semaphore = None
+
+    async def setup_sources(self):
+        """导入并初始化各平台数据源，失败的平台会被跳过（下次运行时重试）"""
+        sources = {}
+        for platform in self.platforms:
+            if platform in self.sources:
+                sources[platform] = self.sources[platform]
+                continue
+            try:
+                source = SOURCES[platform]()
+                await source.setup()
+                sources[platform] = source
+            except Exception as e:
+                print(f"初始化 {platform} 数据源失败: {str(e)}")
+        return sources
+
+    async def fetch_author(self, platform, source, author):
+        """在并发上限内抓取单个作者，返回 (平台, 作者, 内容列表)"""
+        # 先取平台名额再取全局名额：在平台上限处排队的任务不占用全局名额，不会拖慢其他平台
+        async with self.platform_semaphores[platform], self.global_semaphore:
+            try:
+                with get_metrics(platform).track():
+                    return platform, author, await source.fetch(author)
+            except Exception as e:
+                print(f"[{platform}] 抓取 {author} 时出错: {str(e)}")
+                return platform, author, []
+
+    def plan_authors(self, sources, results):
+        """列出本轮要抓取的作者 {平台: [作者, ...]}
+
+        使用抓取计划时，本轮跳过的作者沿用上次抓取到的内容。
+        """
+        authors_by_platform = {}
+        for platform, source in sources.items():
+            try:
+                authors_by_platform[platform] = list(source.authors())
+            except Exception as e:
+                print(f"获取 {platform} 作者列表失败: {str(e)}")
+        if not self.planner:
+            return authors_by_platform
+
+        planned = self.planner.plan(authors_by_platform)
+        for platform, authors in authors_by_platform.items():
+            for author in authors:
+                if author not in planned[platform]:
+                    results[platform].extend(self.planner.last_items(platform, author))
+        return planned
+
+    async def run_async(self, on_result=None):
+        """运行所有抓取任务，返回 {平台: 内容列表}
+
+        每个作者抓取完成后立即调用 on_result(平台, 内容列表)，调用方无需等待全部完成或读取文件。
+        """
+        reset_metrics(self.platforms)
+        self.global_semaphore = self.shared_global_semaphore or asyncio.Semaphore(self.global_limit)
+        self.platform_semaphores = {
+            platform: asyncio.Semaphore(self.platform_limits.get(platform, 1))
+            for platform in self.platforms
+        }
+
+        # 同步爬虫在线程中运行，线程数与全局并发上限一致
+        loop = asyncio.get_running_loop()
+        executor = self.executor or ThreadPoolExecutor(max_workers=self.global_limit)
+        loop.set_default_executor(executor)
+
+        sources = await self.setup_sources()
+        if self.keep_sources:
+            self.sources = sources
+        results = {platform: [] for platform in sources}
+        try:
+            tasks = []
+            for platform, authors in self.plan_authors(sources, results).items():
+                for author in authors:
+                    tasks.append(asyncio.create_task(self.fetch_author(platform, sources[platform], author)))
+
+            print(f"\n共调度 {len(tasks)} 个抓取任务")
+            for task in asyncio.as_completed(tasks):
+                platform, author, items = await task
+                results[platform].extend(items)
+                if self.planner:
+                    if items:
+                        published = [sources[platform].published_at(item) for item in items]
+                        self.planner.observe(platform, author, items, published)
+                    else:
+                        # 抓取失败：不更新上次抓取时间（下一轮仍然到期），仪表板继续显示上次的内容
+                        results[platform].extend(self.planner.last_items(platform, author))
+                if on_result and items:
+                    try:
+                        on_result(platform, items)
+                    except Exception as e:
+                        print(f"处理 {platform} 结果时出错: {str(e)}")
+        finally:
+            if not self.keep_sources:
+                await self.close_sources(sources)
+            if executor is not self.executor:
+                executor.shutdown(wait=False)
+            if self.planner:
+                try:
+                    self.planner.save()
+                except Exception as e:
+                    print(f"保存抓取计划状态失败: {str(e)}")
+
+        # 结果保存到内容库（同一内容按平台ID更新）
+        for platform, items in results.items():
+            if items:
+                try:
+                    sources[platform].save(items)
+                except Exception as e:
+                    print(f"保存 {platform} 结果失败: {str(e)}")
+            print(f"[{platform}] 获取到 {len(items)} 条内容")
+
+        write_report(self.report_file, names=self.platforms)
+        return results
+
+    async def close_sources(self, sources):
+        """关闭数据源"""
+        for platform, source in sources.items():
+            try:
+                await source.close()
+            except Exception as e:
+                print(f"关闭 {platform} 数据源失败: {str(e)}")
+
+    async def close(self):
+        """关闭保持打开的数据源（keep_sources=True 时使用）"""
+        sources, self.sources = self.sources, {}
+        await self.close_sources(sources)
+
+    def run(self, on_result=None):
+        """同步入口"""
+        return asyncio.run(self.run_async(on_result))
@@ -2,12 +2,52 @@
 # -*- coding: utf-8 -*-
 
 import os
-import json
 import logging
 import asyncio
 from datetime import datetime
-from playwright.async_api import async_playwright
+from bs4 import BeautifulSoup
 from dotenv import load_dotenv
+from metrics import get_metrics, write_report
+from content_store import get_store
+from http_cassette import active_cassette
+
+metrics = get_metrics('podcast')
+
+# 播客列表
+PODCASTS = [
+    'https://podcasts.apple.com/us/podcast/%E5%A4%A9%E7%9C%9F%E4%B8%8D%E5%A4%A9%E7%9C%9F/id1731784296?l=zh-Hans-CN',
+    'https://podcasts.apple.com/us/podcast/%E6%96%87%E5%8C%96%E6%9C%89%E9%99%90/id1482731836?l=zh-Hans-CN'
+]
+
+def parse_podcast_page(html):
+    """解析 Apple Podcasts 节目页面，返回只包含最新一集的列表（没有剧集时返回空列表）"""
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    def text_of(element, selector, default=''):
+        found = element.select_one(selector)
+        return found.get_text() if found else default
+    
+    # 只处理第一个（最新）剧集
+    item = soup.select_one('.web-chrome-playback-track')
+    if not item:
+        return []
+    
+    # 获取剧集链接
+    link = item.select_one('a[href*="/episode/"]')
+    episode_url = link.get('href', '') if link else ""
+    if episode_url and not episode_url.startswith('http'):
+        episode_url = f"https://podcasts.apple.com{episode_url}"
+    
+    return [{
+        'title': text_of(item, '.track-title', "未知标题").strip(),
+        'date': text_of(item, 'time', "未知日期").strip(),
+        'duration': text_of(item, '.time-duration').strip(),
+        'description': text_of(item, '.track-description').strip(),
+        'podcast_title': text_of(soup, '.product-header__title').strip(),
+        'platform': 'Apple Podcasts',
+        'url': episode_url,
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }]
 
 class PodcastScraper:
     def __init__(self):
@@ -15,6 +55,8 @@ class PodcastScraper:
         
     async def setup_browser(self):
         """设置浏览器"""
+        # 只在需要浏览器时导入 playwright，解析函数（parse_podcast_page）不依赖浏览器
+        from playwright.async_api import async_playwright
         self.playwright = await async_playwright().start()
         self.browser = await self.playwright.chromium.launch(
             headless=True,
@@ -57,6 +99,12 @@ class PodcastScraper:
             }
         )
         
+        metrics.track_browser_context(self.context)
+        
+        # 在录制/回放模式下运行时，浏览器请求同样经过录制文件
+        if active_cassette():
+            await active_cassette().route_context(self.context)
+        
         await self.context.add_init_script("""
             Object.defineProperty(navigator, 'webdriver', {
                 get: () => undefined
@@ -75,70 +123,29 @@ class PodcastScraper:
         self.page = await self.context.new_page()
         self.page.set_default_timeout(30000)
         
-    async def get_podcast_episodes(self, podcast_url):
-        """获取播客集信息"""
+    async def get_podcast_episodes(self, podcast_url, page=None):
+        """获取播客集信息（可传入独立的 page 以便并发抓取）"""
+        page = page or self.page
         episodes = []
         try:
             # 设置更长的超时时间
-            self.page.set_default_timeout(60000)
+            page.set_default_timeout(60000)
             
             # 访问页面并等待加载
-            await self.page.goto(podcast_url)
+            await page.goto(podcast_url)
             
             # 等待播客标题元素出现
-            await self.page.wait_for_selector('.product-header__title', timeout=60000)
-            await asyncio.sleep(5)  # 额外等待以确保内容加载完成
-            
-            # 获取播客标题
-            podcast_title = await self.page.text_content('.product-header__title')
-            self.logger.info(f"正在获取播客: {podcast_title}")
-            
-            # 等待并获取所有剧集
-            await self.page.wait_for_selector('.web-chrome-playback-track', timeout=60000)
-            episode_items = await self.page.query_selector_all('.web-chrome-playback-track')
-            
-            # 只处理第一个（最新）剧集
-            if episode_items:
-                item = episode_items[0]
-                try:
-                    # 获取剧集标题
-                    title = await item.query_selector('.track-title')
-                    title_text = await title.text_content() if title else "未知标题"
-                    
-                    # 获取发布日期
-                    date = await item.query_selector('time')
-                    date_text = await date.text_content() if date else "未知日期"
-                    
-                    # 获取时长
-                    duration = await item.query_selector('.time-duration')
-                    duration_text = await duration.text_content() if duration else ""
-                    
-                    # 获取描述
-                    description = await item.query_selector('.track-description')
-                    description_text = await description.text_content() if description else ""
-                    
-                    # 获取剧集链接
-                    link = await item.query_selector('a[href*="/episode/"]')
-                    episode_url = await link.get_attribute('href') if link else ""
-                    if episode_url and not episode_url.startswith('http'):
-                        episode_url = f"https://podcasts.apple.com{episode_url}"
-                    
-                    episode = {
-                        'title': title_text.strip(),
-                        'date': date_text.strip(),
-                        'duration': duration_text.strip(),
-                        'description': description_text.strip(),
-                        'podcast_title': podcast_title.strip(),
-                        'platform': 'Apple Podcasts',
-                        'url': episode_url,
-                        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    }
-                    
-                    episodes.append(episode)
-                    self.logger.info(f"获取到最新剧集: {title_text}")
-                    
-                except Exception as e:
-                    self.logger.error(f"解析剧集时出错: {str(e)}")
+            await page.wait_for_selector('.product-header__title', timeout=60000)
+            await metrics.async_sleep(5)  # 额外等待以确保内容加载完成
+            
+            # 等待剧集列表出现后，一次取回页面HTML在本地解析
+            await page.wait_for_selector('.web-chrome-playback-track', timeout=60000)
+            html = await page.content()
+            
+            episodes = parse_podcast_page(html)
+            if episodes:
+                self.logger.info(f"正在获取播客: {episodes[0]['podcast_title']}")
+                self.logger.info(f"获取到最新剧集: {episodes[0]['title']}")
             else:
                 self.logger.warning("未找到任何剧集")
             
@@ -147,14 +154,13 @@ class PodcastScraper:
         
         return episodes
             
-    def save_episodes_to_json(self, episodes, output_file='podcast_episodes.json'):
-        """保存剧集信息到JSON文件"""
+    def save_episodes(self, episodes):
+        """保存剧集信息到内容库"""
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(episodes, f, ensure_ascii=False, indent=2)
-            self.logger.info(f"已保存剧集信息到 {output_file}")
+            count = get_store().upsert_items('podcast', episodes)
+            self.logger.info(f"已保存 {count} 个剧集到内容库")
         except Exception as e:
-            self.logger.error(f"保存JSON文件时出错: {str(e)}")
+            self.logger.error(f"保存到内容库时出错: {str(e)}")
             
     def generate_html(self, episodes, output_file='podcast_episodes.html'):
         """生成剧集列表的HTML内容"""
@@ -187,10 +193,7 @@ class PodcastScraper:
             load_dotenv()
             
             # 获取播客列表
-            podcasts = [
-                'https://podcasts.apple.com/us/podcast/%E5%A4%A9%E7%9C%9F%E4%B8%8D%E5%A4%A9%E7%9C%9F/id1731784296?l=zh-Hans-CN',
-                'https://podcasts.apple.com/us/podcast/%E6%96%87%E5%8C%96%E6%9C%89%E9%99%90/id1482731836?l=zh-Hans-CN'
-            ]
+            podcasts = PODCASTS
             
             # 初始化浏览器
             await self.setup_browser()
@@ -201,7 +204,8 @@ class PodcastScraper:
             # 遍历每个播客
             for podcast_url in podcasts:
                 print(f"\n开始获取播客: {podcast_url}")
-                episodes = await self.get_podcast_episodes(podcast_url)
+                with metrics.track():
+                    episodes = await self.get_podcast_episodes(podcast_url)
                 if episodes:
                     all_episodes.extend(episodes)
                     print(f"成功获取到 {len(episodes)} 个剧集")
@@ -209,11 +213,11 @@ class PodcastScraper:
                     print(f"未能获取到播客剧集信息")
                 
                 # 添加延迟
-                await asyncio.sleep(2)
+                await metrics.async_sleep(2)
             
             if all_episodes:
                 # 保存剧集信息
-                self.save_episodes_to_json(all_episodes)
+                self.save_episodes(all_episodes)
                 self.generate_html(all_episodes)
                 print(f"\n总计获取到 {len(all_episodes)} 个剧集")
             else:
@@ -242,6 +246,7 @@ async def main():
     
     scraper = PodcastScraper()
     await scraper.run_scraper()
+    write_report('podcast_run_report.json', names=['podcast'])
 
 if __name__ == "__main__":
     asyncio.run(main())
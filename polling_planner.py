@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+
+# 计划状态文件：每个作者的发布时间历史、上次抓取时间和最新内容
+DEFAULT_STATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'polling_state.json')
+
+# 所有平台合计每小时最多抓取的作者次数
+DEFAULT_BUDGET_PER_HOUR = 120
+
+# 同一作者两次抓取的最短和最长间隔（秒）
+MIN_INTERVAL = 30 * 60
+MAX_INTERVAL = 7 * 24 * 3600
+
+# 尚无发布历史的作者默认的发布间隔（秒），可按平台通过 default_gaps 指定
+DEFAULT_GAP = 24 * 3600
+
+# 作者未被抓取期间，新内容预计累计的延迟（条 × 秒）达到该值时抓取。
+# 对平均发布间隔为 g 的作者，相当于每 sqrt(2 × 阈值 × g) 秒抓取一次：
+# 每 2 小时发一条的作者约 1.4 小时抓一次，每天一条约 4.9 小时，每周一条约 13 小时
+STALENESS_THRESHOLD = 30 * 60
+
+# 每个作者保留的发布时间数量
+HISTORY_SIZE = 20
+
+
+class PollingPlanner:
+    """自适应抓取计划：根据每个作者的发布间隔决定本轮抓取哪些作者
+
+    把作者的发布看作泊松过程，平均间隔取最近几次发布的间隔（长期不更新时按距上次发布的时间放大）。
+    距上次抓取 t 秒后，尚未发现的新内容预计累计延迟 t² / (2 × 平均间隔)，达到阈值的作者按该值从高到低抓取，
+    总抓取次数受每小时预算限制。抓取间隔与发布频率的平方根成反比，在相同请求量下新内容的平均延迟最小。
+    """
+
+    def __init__(self, state_file=DEFAULT_STATE_FILE, budget_per_hour=DEFAULT_BUDGET_PER_HOUR,
+                 min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, default_gaps=None,
+                 staleness_threshold=STALENESS_THRESHOLD):
+        self.state_file = state_file
+        self.budget_per_hour = budget_per_hour
+        self.staleness_threshold = staleness_threshold
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_gaps = dict(default_gaps or {})
+        self.authors = {}
+        self.polls = []
+        self.load()
+
+    def load(self):
+        """加载计划状态"""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.authors = state.get('authors', {})
+            self.polls = state.get('polls', [])
+        except Exception as e:
+            print(f"加载抓取计划状态失败: {str(e)}")
+
+    def save(self):
+        """保存计划状态"""
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'authors': self.authors, 'polls': self.polls}, f, ensure_ascii=False, default=str)
+        os.replace(tmp_file, self.state_file)
+
+    @staticmethod
+    def author_key(platform, author):
+        return f"{platform}:{author}"
+
+    def author_state(self, platform, author):
+        return self.authors.setdefault(self.author_key(platform, author), {
+            'published': [],
+            'last_poll': None,
+            'last_url': None,
+            'items': [],
+        })
+
+    def mean_gap(self, platform, author, now):
+        """估计作者的平均发布间隔（秒）"""
+        state = self.authors.get(self.author_key(platform, author))
+        published = sorted(state['published']) if state else []
+        if len(published) < 2:
+            gap = self.default_gaps.get(platform, DEFAULT_GAP)
+        else:
+            gap = (published[-1] - published[0]) / (len(published) - 1)
+        # 长期没有更新的作者视为不活跃，间隔至少为距上次发布的时间
+        if published:
+            gap = max(gap, now - published[-1])
+        return max(gap, 1.0)
+
+    def staleness(self, platform, author, now):
+        """距上次抓取后新内容预计累计的延迟（条 × 秒），从未抓取过的作者为无穷大"""
+        state = self.authors.get(self.author_key(platform, author))
+        if not state or state['last_poll'] is None:
+            return float('inf')
+        elapsed = now - state['last_poll']
+        if elapsed < self.min_interval:
+            return 0.0
+        staleness = elapsed * elapsed / (2 * self.mean_gap(platform, author, now))
+        if elapsed >= self.max_interval:
+            # 超过最长间隔的作者一定抓取
+            staleness = max(staleness, self.staleness_threshold)
+        return staleness
+
+    def remaining_budget(self, now):
+        """最近一小时内剩余的抓取次数"""
+        self.polls = [t for t in self.polls if now - t < 3600]
+        return max(0, self.budget_per_hour - len(self.polls))
+
+    def plan(self, authors_by_platform, now=None):
+        """返回本轮需要抓取的作者 {平台: [作者, ...]}，按新内容的预计延迟从高到低，不超过预算"""
+        now = now or time.time()
+        candidates = []
+        for platform, authors in authors_by_platform.items():
+            for author in authors:
+                staleness = self.staleness(platform, author, now)
+                if staleness >= self.staleness_threshold:
+                    candidates.append((staleness, platform, author))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        selected = {platform: [] for platform in authors_by_platform}
+        for staleness, platform, author in candidates[:self.remaining_budget(now)]:
+            selected[platform].append(author)
+            # 预先占用预算，同一小时内的其他计划不会超出
+            self.polls.append(now)
+
+        planned = sum(len(authors) for authors in selected.values())
+        total = sum(len(authors) for authors in authors_by_platform.values())
+        print(f"抓取计划: 本轮抓取 {planned}/{total} 个作者（到期 {len(candidates)} 个）")
+        return selected
+
+    def observe(self, platform, author, items, published_times, now=None):
+        """记录一次成功的抓取：更新上次抓取时间，新的发布时间计入历史，保存最新内容供跳过抓取时沿用
+
+        published_times 为各内容发布时间的 Unix 时间戳（调用方负责按平台的时区转换）。
+        抓取失败时不要调用，作者在下一轮仍然到期。
+        """
+        now = now or time.time()
+        if not items:
+            return
+        state = self.author_state(platform, author)
+        state['last_poll'] = now
+
+        # 没有发布时间的平台以内容链接变化作为一次新发布，发布时间按本次抓取时间近似
+        latest_url = items[0].get('url')
+        if not any(published_times) and latest_url and latest_url != state['last_url']:
+            if state['last_url'] is not None:
+                published_times = [now]
+        state['last_url'] = latest_url
+
+        for published in published_times:
+            if published and published not in state['published']:
+                state['published'].append(published)
+        state['published'] = sorted(state['published'])[-HISTORY_SIZE:]
+        state['items'] = items
+
+    def last_items(self, platform, author):
+        """返回作者上次抓取到的内容"""
+        state = self.authors.get(self.author_key(platform, author))
+        return list(state['items']) if state else []
@@ -1,5 +1,5 @@
 import random
-import requests
+from http_session import create_session
 from fake_useragent import UserAgent
 import time
 import json
@@ -10,6 +10,9 @@ class ProxyManager:
     def __init__(self):
         self.proxies = []
         self.user_agent = UserAgent()
+        self.session = create_session()
+        # 验证代理时连接失败就说明代理不可用，不重试；每个代理是独立的出口，不按主机限速
+        self.verify_session = create_session(retries=0, rate_limit=False)
         self.last_update = 0
         self.update_interval = 300  # 5分钟更新一次代理列表
         
@@ -65,7 +68,7 @@ class ProxyManager:
         new_proxies = set()
         for source in proxy_sources:
             try:
-                response = requests.get(source, timeout=10)
+                response = self.session.get(source, timeout=10)
                 if response.status_code == 200:
                     proxies = response.text.strip().split('\n')
                     new_proxies.update(proxies)
@@ -113,7 +116,7 @@ class ProxyManager:
             ]
             
             for url in test_urls:
-                response = requests.get(
+                response = self.verify_session.get(
                     url,
                     proxies=proxy_dict,
                     timeout=5,
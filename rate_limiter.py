@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import sqlite3
+import threading
+from urllib.parse import urlparse
+import metrics
+
+# 每个主机的限速：(每秒请求数, 突发请求数)
+HOST_RATES = {
+    'api.bilibili.com': (0.25, 2),   # B站风控严格：平均每4秒一个请求
+    'api.twitter.com': (1.0, 5),
+}
+DEFAULT_RATE = (2.0, 5)
+
+# 这些主机用 HTTP 200 响应中的错误码表示限流（B站 -799），传输层无法判断请求是否成功，
+# 由调用方在确认成功后调用 record_success 重置退避次数
+BODY_LIMITED_HOSTS = ('api.bilibili.com',)
+
+# 遇到限流（HTTP 429 / B站 -799）后暂停该主机的时间：从 BACKOFF_BASE 开始每次翻倍，最多 BACKOFF_MAX
+BACKOFF_BASE = 30
+BACKOFF_MAX = 600
+
+# 所有进程共用的限速状态
+DEFAULT_STATE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rate_limits.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    host TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def host_of(url_or_host):
+    return urlparse(url_or_host).netloc or url_or_host
+
+
+class TokenBucket:
+    """令牌桶：按固定速率补充令牌，令牌用完时计算需要等待的时间"""
+
+    def __init__(self, rate, burst, tokens=None, updated=None, failures=0):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst) if tokens is None else tokens
+        # 令牌数对应的时间点（time.time()，多个进程共用）；限流暂停期间会被推迟到暂停结束
+        self.updated = time.time() if updated is None else updated
+        self.failures = failures
+
+    def reserve(self, now):
+        """取一个令牌，返回需要等待的秒数（令牌可以预支，后来的请求排在后面）"""
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        self.tokens -= 1
+        deficit = max(0.0, -self.tokens)
+        return (self.updated - now) + deficit / self.rate
+
+    def pause(self, now, seconds):
+        """暂停到 now + seconds，暂停结束时只放行一个请求"""
+        self.updated = max(self.updated, now + seconds)
+        self.tokens = 1.0
+
+
+class RateLimiter:
+    """按主机限速：只在该主机的令牌用完时才等待，遇到限流时自动退避（状态只在当前进程内）"""
+
+    def __init__(self, rates=None, default_rate=DEFAULT_RATE):
+        self.rates = dict(HOST_RATES)
+        self.rates.update(rates or {})
+        self.default_rate = default_rate
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def new_bucket(self, host, **state):
+        return TokenBucket(*self.rates.get(host, self.default_rate), **state)
+
+    def update(self, host, action):
+        """对主机的令牌桶执行 action(令牌桶, 当前时间)，返回其结果"""
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = self.new_bucket(host)
+            return action(self.buckets[host], time.time())
+
+    def reserve(self, url_or_host):
+        """取一个令牌，返回需要等待的秒数"""
+        return self.update(host_of(url_or_host), lambda bucket, now: bucket.reserve(now))
+
+    def acquire(self, url_or_host, sleep=None):
+        """等待直到可以向该主机发送请求，返回等待的秒数
+
+        sleep 默认为 metrics.delay；传入 RunMetrics.sleep 时等待时间计入对应爬虫的统计。
+        """
+        wait = self.reserve(url_or_host)
+        if wait > 0:
+            (sleep or metrics.delay)(wait)
+        return wait
+
+    def backoff(self, url_or_host, retry_after=None):
+        """主机返回限流时暂停该主机，返回暂停的秒数（有 Retry-After 时以其为准）"""
+        def pause(bucket, now):
+            bucket.failures += 1
+            seconds = retry_after if retry_after else min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (bucket.failures - 1))
+            bucket.pause(now, seconds)
+            return seconds
+
+        host = host_of(url_or_host)
+        seconds = self.update(host, pause)
+        print(f"[{host}] 触发限流，暂停 {seconds:.0f} 秒")
+        return seconds
+
+    def record_success(self, url_or_host):
+        """请求成功后重置退避次数（BODY_LIMITED_HOSTS 中的主机由调用方确认成功后调用）"""
+        def reset(bucket, now):
+            bucket.failures = 0
+        self.update(host_of(url_or_host), reset)
+
+
+class SharedRateLimiter(RateLimiter):
+    """本机所有进程共用的限速器：令牌桶保存在 SQLite 中，每次更新都在写事务（文件锁）内完成
+
+    并行运行的爬虫进程从同一个预算中取令牌，任何一个进程触发的退避对所有进程生效。
+    """
+
+    def __init__(self, path=DEFAULT_STATE_DB, rates=None, default_rate=DEFAULT_RATE):
+        super().__init__(rates, default_rate)
+        self.path = path
+        # 手动管理事务：BEGIN IMMEDIATE 立即取得写锁，其他进程在此期间等待
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def update(self, host, action):
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.conn.execute(
+                    'SELECT tokens, updated, failures FROM buckets WHERE host = ?', (host,)
+                ).fetchone()
+                if row:
+                    bucket = self.new_bucket(host, tokens=row[0], updated=row[1], failures=row[2])
+                else:
+                    bucket = self.new_bucket(host)
+                result = action(bucket, time.time())
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO buckets (host, tokens, updated, failures) VALUES (?, ?, ?, ?)',
+                    (host, bucket.tokens, bucket.updated, bucket.failures)
+                )
+                self.conn.execute('COMMIT')
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            return result
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 响应头（只支持秒数），无法解析时返回 None"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """本机所有进程共用的限速器，无法打开状态数据库时退回到只在当前进程内限速"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            try:
+                _limiter = SharedRateLimiter()
+            except sqlite3.Error as e:
+                print(f"打开限速状态数据库失败，只在当前进程内限速: {str(e)}")
+                _limiter = RateLimiter()
+        return _limiter
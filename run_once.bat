@@ -1,6 +1,6 @@
 @echo off
-echo Running YouTube Scraper once...
+echo Running all scrapers once...
 cd /d "%~dp0"
-python "C:/Users/ZhuanZ1/CascadeProjects/youtube_scraper/run_once.py"
-echo Scraping completed. Check youtube_scraper.log for details.
+python scheduler.py --once
+echo Scraping completed. Check scheduler.log for details.
 pause
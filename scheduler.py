@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""常驻调度进程：按各平台的间隔定时抓取并更新仪表板
+
+取代各脚本中的 schedule 循环和 start_scraper.bat / run_once.bat。
+所有平台共用一个线程池，同一平台的两次抓取不会重叠，单次抓取失败不会影响进程运行。
+默认使用自适应抓取计划（见 polling_planner.py），常更新的作者抓取得更频繁。
+不经过流水线的独立抓取脚本（SCRIPT_JOBS，例如 bilibili_web）每天在固定时刻运行一次。
+
+用法:
+    python scheduler.py                # 常驻运行
+    python scheduler.py --once youtube # 只运行一次指定平台（不指定则运行全部）后退出
+"""
+
+import os
+import random
+import importlib
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pipeline import ScraperPipeline, SOURCES, GLOBAL_LIMIT
+from dashboard import Dashboard
+from output_writer import OutputWriter
+from polling_planner import PollingPlanner, DEFAULT_BUDGET_PER_HOUR
+
+# 各平台的抓取间隔（秒）；自适应模式下作为尚无发布历史的作者的默认发布间隔
+SCHEDULE_INTERVALS = {
+    'youtube': 6 * 3600,
+    'x': 2 * 3600,
+    'bilibili': 24 * 3600,
+    'twitter': 6 * 3600,
+    'wechat': 12 * 3600,
+    'xiaohongshu': 12 * 3600,
+    'podcast': 24 * 3600,
+}
+
+# 不经过流水线的独立抓取脚本：任务名 -> (模块, 类, 方法, 每天的运行时刻)
+# 脚本自行保存结果并推送仪表板数据，调度进程只负责按时运行
+SCRIPT_JOBS = {
+    'bilibili_web': ('bilibili_web_scraper_new', 'BilibiliWebScraper', 'run_scraper', '08:00'),
+}
+
+# 随机抖动占间隔的比例，避免每次都在同一时刻请求
+JITTER_RATIO = 0.1
+
+# 任务失败后的重试等待（秒）
+RETRY_DELAY = 15 * 60
+
+# 自适应模式下各平台检查抓取计划的间隔（秒）
+PLANNER_TICK = 15 * 60
+
+logger = logging.getLogger(__name__)
+
+
+class ScraperJob:
+    """单个平台的定时抓取任务"""
+
+    def __init__(self, name, interval, executor, jitter_ratio=JITTER_RATIO, planner=None):
+        self.name = name
+        self.interval = interval
+        self.jitter_ratio = jitter_ratio
+        # 数据源在多次运行之间保持打开，复用会话和浏览器
+        self.pipeline = ScraperPipeline(
+            platforms=[name],
+            executor=executor,
+            keep_sources=True,
+            report_file=f'{name}_run_report.json',
+            planner=planner
+        )
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+
+    def next_delay(self, failed=False):
+        """距离下次运行的秒数（带随机抖动）"""
+        base = min(RETRY_DELAY, self.interval) if failed else self.interval
+        jitter = base * self.jitter_ratio
+        return max(0.0, base + random.uniform(-jitter, jitter))
+
+    async def run_once(self):
+        """运行一次抓取，返回本轮结果列表（失败时抛出异常）"""
+        # 每个平台只有一个循环任务，正常情况下不会重叠；这里再做一次保护
+        if self.running:
+            logger.warning(f"[{self.name}] 上一次抓取尚未结束，跳过本次")
+            return None
+        self.running = True
+        try:
+            self.runs += 1
+            results = await self.pipeline.run_async()
+            return results.get(self.name, [])
+        finally:
+            self.running = False
+
+
+class ScriptJob(ScraperJob):
+    """每天在固定时刻运行一次的独立抓取脚本（见 SCRIPT_JOBS）"""
+
+    def __init__(self, name, executor, module_name, class_name, method_name, at):
+        self.name = name
+        self.interval = 24 * 3600
+        self.executor = executor
+        self.module_name = module_name
+        self.class_name = class_name
+        self.method_name = method_name
+        self.at = datetime.strptime(at, '%H:%M').time()
+        self.pipeline = None
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+
+    def next_delay(self, failed=False):
+        """距离下次运行的秒数：失败后 RETRY_DELAY 秒重试，否则等到下一个运行时刻"""
+        if failed:
+            return RETRY_DELAY
+        now = datetime.now()
+        next_run = datetime.combine(now.date(), self.at)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    def run_script(self):
+        module = importlib.import_module(self.module_name)
+        scraper = getattr(module, self.class_name)()
+        getattr(scraper, self.method_name)()
+
+    async def run_once(self):
+        """在线程池中运行一次脚本（失败时抛出异常）；脚本自行更新仪表板，返回 None"""
+        if self.running:
+            logger.warning(f"[{self.name}] 上一次抓取尚未结束，跳过本次")
+            return None
+        self.running = True
+        try:
+            self.runs += 1
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.run_script)
+            logger.info(f"[{self.name}] 脚本运行完成")
+            return None
+        finally:
+            self.running = False
+
+
+class ScraperDaemon:
+    """常驻调度进程"""
+
+    def __init__(self, platforms=None, intervals=None, global_limit=GLOBAL_LIMIT,
+                 adaptive=True, budget_per_hour=DEFAULT_BUDGET_PER_HOUR):
+        self.platforms = list(platforms or [*SOURCES, *SCRIPT_JOBS])
+        self.global_limit = global_limit
+        self.intervals = dict(SCHEDULE_INTERVALS)
+        self.intervals.update(intervals or {})
+        # 所有平台共用的线程池
+        self.executor = ThreadPoolExecutor(max_workers=global_limit)
+        # 自适应模式：各平台按 PLANNER_TICK 检查，由抓取计划决定本轮抓取哪些作者
+        self.planner = None
+        if adaptive:
+            self.planner = PollingPlanner(budget_per_hour=budget_per_hour, default_gaps=self.intervals)
+        self.jobs = {
+            name: ScraperJob(
+                name,
+                min(PLANNER_TICK, self.intervals[name]) if adaptive else self.intervals[name],
+                self.executor,
+                planner=self.planner
+            )
+            for name in self.platforms if name in SOURCES
+        }
+        for name in self.platforms:
+            if name in SCRIPT_JOBS:
+                self.jobs[name] = ScriptJob(name, self.executor, *SCRIPT_JOBS[name])
+        self.dashboard = Dashboard(global_limit=global_limit)
+        # 启动时先从内容库加载已有数据，避免某个平台尚未抓取时仪表板被清空
+        self.dashboard.load_stored_data()
+
+    def update_dashboard(self, name, items):
+        """用平台的最新结果更新仪表板（内容未变化时不会重写文件）"""
+        if not items:
+            logger.info(f"[{name}] 本轮没有获取到内容，保留仪表板中的旧数据")
+            return
+        self.dashboard.replace_results(name, items)
+        self.dashboard.writer = OutputWriter()
+        self.dashboard.generate_dashboard()
+
+    async def run_job(self, job):
+        """运行一次任务，返回是否成功"""
+        start = datetime.now()
+        logger.info(f"[{job.name}] 开始抓取")
+        try:
+            items = await job.run_once()
+            if items is None:
+                return True
+            self.update_dashboard(job.name, items)
+            logger.info(f"[{job.name}] 抓取完成，获取到 {len(items)} 条内容，"
+                        f"耗时 {(datetime.now() - start).total_seconds():.1f} 秒")
+            return True
+        except Exception as e:
+            job.failures += 1
+            logger.error(f"[{job.name}] 抓取失败: {str(e)}", exc_info=True)
+            return False
+
+    async def job_loop(self, job, initial_delay=0.0):
+        """按间隔循环运行单个平台的任务"""
+        await asyncio.sleep(initial_delay)
+        while True:
+            ok = await self.run_job(job)
+            delay = job.next_delay(failed=not ok)
+            next_run = datetime.now() + timedelta(seconds=delay)
+            logger.info(f"[{job.name}] 下次运行时间: {next_run.strftime('%Y-%m-%d %H:%M:%S')}")
+            await asyncio.sleep(delay)
+
+    def share_global_limit(self):
+        """所有平台的流水线共用一个全局并发上限，同时运行的抓取任务合计不超过 global_limit（需在事件循环中调用）"""
+        semaphore = asyncio.Semaphore(self.global_limit)
+        for job in self.jobs.values():
+            if job.pipeline:
+                job.pipeline.shared_global_semaphore = semaphore
+
+    async def run_forever(self):
+        """常驻运行所有平台的任务"""
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(self.executor)
+        self.share_global_limit()
+        logger.info(f"调度进程启动，平台: {', '.join(self.platforms)}")
+        tasks = []
+        for index, job in enumerate(self.jobs.values()):
+            # 错开各平台的首次运行时间
+            tasks.append(asyncio.create_task(self.job_loop(job, initial_delay=index * 5)))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await self.close()
+
+    async def run_all_once(self):
+        """所有平台各运行一次（并行）后退出"""
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(self.executor)
+        self.share_global_limit()
+        try:
+            await asyncio.gather(*(self.run_job(job) for job in self.jobs.values()))
+        finally:
+            await self.close()
+
+    async def close(self):
+        """关闭所有数据源和线程池"""
+        for job in self.jobs.values():
+            if job.pipeline:
+                await job.pipeline.close()
+        self.executor.shutdown(wait=False)
+
+
+def setup_logging():
+    """设置日志"""
+    log_dir = os.path.dirname(os.path.abspath(__file__))
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(os.path.join(log_dir, 'scheduler.log'), encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='常驻调度进程：定时抓取各平台并更新仪表板')
+    # 不使用 choices：Python 3.11 及更早版本中 nargs='*' 与 choices 同时使用时，不指定平台会报错
+    parser.add_argument('platforms', nargs='*', metavar='platform',
+                        help=f"要调度的平台（默认全部）: {', '.join([*SOURCES, *SCRIPT_JOBS])}")
+    parser.add_argument('--once', action='store_true', help='每个平台只运行一次后退出')
+    parser.add_argument('--global-limit', type=int, default=GLOBAL_LIMIT,
+                        help='所有平台合计的最大并发抓取数')
+    parser.add_argument('--fixed', action='store_true',
+                        help='按固定间隔抓取所有作者，不使用自适应抓取计划')
+    parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET_PER_HOUR,
+                        help='自适应模式下所有平台合计每小时最多抓取的作者次数')
+    args = parser.parse_args()
+    known = [*SOURCES, *SCRIPT_JOBS]
+    unknown = [name for name in args.platforms if name not in known]
+    if unknown:
+        parser.error(f"未知的平台: {', '.join(unknown)}（可选: {', '.join(sorted(known))}）")
+
+    setup_logging()
+    daemon = ScraperDaemon(
+        platforms=args.platforms or None,
+        global_limit=args.global_limit,
+        adaptive=not (args.fixed or args.once),
+        budget_per_hour=args.budget
+    )
+    try:
+        if args.once:
+            asyncio.run(daemon.run_all_once())
+        else:
+            asyncio.run(daemon.run_forever())
+    except KeyboardInterrupt:
+        logger.info("调度进程已停止")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,8 +2,12 @@ import os
 import time
 import hashlib
 import requests
+from http_session import create_session
 from dotenv import load_dotenv
 
+# 所有搜索共用一个会话，复用到 api.newrank.cn 的连接
+session = create_session()
+
 def search_wechat_account(keyword):
     # 加载环境变量
     load_dotenv()
@@ -36,7 +40,7 @@ def search_wechat_account(keyword):
         for k, v in params.items():
             print(f"{k}: {v}")
         
-        response = requests.post(url, json=params, headers=headers, timeout=10)
+        response = session.post(url, json=params, headers=headers, timeout=10)
         print(f"响应状态码: {response.status_code}")
         print(f"响应内容: {response.text[:500]}...")  # 只显示前500个字符
         
@@ -1,6 +1,6 @@
 @echo off
-echo Starting YouTube Scraper...
+echo Starting scraper scheduler...
 cd /d "%~dp0"
-start /b pythonw youtube_scraper.py
-echo Scraper started in background. Check youtube_scraper.log for details.
+start /b pythonw scheduler.py
+echo Scheduler started in background. Check scheduler.log for details.
 pause
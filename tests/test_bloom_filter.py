@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""布隆过滤器：没有漏判，误判率接近设定值"""
+
+from bloom_filter import BloomFilter
+
+
+def test_no_false_negatives():
+    bloom = BloomFilter(1000)
+    for i in range(1000):
+        bloom.add(f'id{i}')
+    assert all(f'id{i}' in bloom for i in range(1000))
+    assert not bloom.is_full()
+    bloom.add('one more')
+    assert bloom.is_full()
+
+
+def test_false_positive_rate():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(i)
+    false_positives = sum(f'other{i}' in bloom for i in range(10000))
+    assert false_positives < 300
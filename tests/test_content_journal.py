@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""内容日志：追加、读取最近记录、部分清除和索引重建"""
+
+import os
+from content_journal import ContentJournal
+
+
+def test_recent_reads_newest_first(tmp_path):
+    journal = ContentJournal(str(tmp_path / 'journal.jsonl'))
+    for i in range(5):
+        journal.append({'n': i, 'title': f'标题{i}'})
+    assert len(journal) == 5
+    assert [record['n'] for record in journal.recent(3)] == [4, 3, 2]
+    assert [record['n'] for record in journal.entries()] == [0, 1, 2, 3, 4]
+
+
+def test_clear_keeps_later_records(tmp_path):
+    journal = ContentJournal(str(tmp_path / 'journal.jsonl'))
+    for i in range(5):
+        journal.append({'n': i})
+    journal.clear(3)
+    assert [record['n'] for record in journal.entries()] == [3, 4]
+    assert [record['n'] for record in journal.recent(5)] == [4, 3]
+    # 清除后继续追加，索引中的偏移仍然正确
+    journal.append({'n': 5})
+    assert [record['n'] for record in journal.recent(2)] == [5, 4]
+    journal.clear()
+    assert len(journal) == 0
+    assert journal.entries() == []
+
+
+def test_rebuilds_missing_index_and_drops_partial_line(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = ContentJournal(path)
+    for i in range(3):
+        journal.append({'n': i})
+    os.remove(f"{path}.idx")
+    # 模拟写了一半就中断的记录
+    with open(path, 'ab') as f:
+        f.write(b'{"n": 3')
+
+    journal = ContentJournal(path)
+    assert len(journal) == 3
+    assert [record['n'] for record in journal.recent(3)] == [2, 1, 0]
+    journal.append({'n': 3})
+    assert [record['n'] for record in journal.entries()] == [0, 1, 2, 3]
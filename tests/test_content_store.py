@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""内容库：按平台ID去重更新、已见判断和每个作者的最新内容"""
+
+from content_store import ContentStore, UPLOADS
+
+
+def test_upsert_updates_existing_item(tmp_path):
+    store = ContentStore(str(tmp_path / 'content.db'))
+    try:
+        store.upsert_items('bilibili', [{'bvid': 'BV1', 'title': '旧标题', 'author': 'A'}])
+        store.upsert_items('bilibili', [{'bvid': 'BV1', 'title': '新标题', 'author': 'A'}])
+        assert store.get_item('bilibili', 'BV1')['title'] == '新标题'
+        assert len(store.recent_items('bilibili')) == 1
+        # 不同集合之间互不影响
+        assert not store.has_item('bilibili', 'BV1', collection=UPLOADS)
+    finally:
+        store.close()
+
+
+def test_is_seen_after_upsert_and_mark(tmp_path):
+    store = ContentStore(str(tmp_path / 'content.db'))
+    try:
+        assert not store.is_seen('x', '1')
+        store.upsert_items('x', [{'tweet_id': '1', 'author': 'u'}])
+        store.mark_seen('x', ['2'])
+        assert store.is_seen('x', '1')
+        assert store.is_seen('x', 2)
+        assert not store.is_seen('x', '3')
+        assert not store.is_seen('youtube', '1')
+        # 手动添加的内容不登记为已见
+        store.upsert_items('x', [{'tweet_id': '4', 'author': 'u'}], collection=UPLOADS)
+        assert not store.is_seen('x', '4')
+    finally:
+        store.close()
+
+
+def test_seen_survives_reopen(tmp_path):
+    path = str(tmp_path / 'content.db')
+    store = ContentStore(path)
+    store.upsert_items('x', [{'tweet_id': '1', 'author': 'u'}])
+    store.close()
+    store = ContentStore(path)
+    try:
+        assert store.is_seen('x', '1')
+    finally:
+        store.close()
+
+
+def test_latest_per_author(tmp_path):
+    store = ContentStore(str(tmp_path / 'content.db'))
+    try:
+        store.upsert_items('youtube', [
+            {'video_id': 'a1', 'author': 'A', 'published': '2024-01-01 08:00:00'},
+            {'video_id': 'a2', 'author': 'A', 'published': '2024-01-03 08:00:00'},
+            {'video_id': 'b1', 'author': 'B', 'published': '2024-01-02 08:00:00'},
+        ])
+        latest = store.latest_per_author('youtube')
+        assert [item['video_id'] for item in latest] == ['a2', 'b1']
+    finally:
+        store.close()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""HTML 解析后端：只截取并解析第一个条目，各后端结果相同"""
+
+import pytest
+from html_parser import available_backends, first_element_html, read_first_element, parse_first_element
+
+PAGE = (
+    '<html><head><title>t</title></head><body><nav>导航</nav>'
+    '<div class="timeline-item pinned"><a class="tweet-link" href="/u/status/1">#</a>'
+    '<div class="tweet-content"> 第一条 </div></div>'
+    '<div class="timeline-item"><div class="tweet-content">第二条</div></div>'
+    '</body></html>'
+)
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_first_element_html_stops_at_next_item():
+    fragment = first_element_html(PAGE, 'div', 'timeline-item')
+    assert fragment.startswith('<div class="timeline-item pinned">')
+    assert '第一条' in fragment and '第二条' not in fragment
+    assert first_element_html(PAGE, 'div', 'missing') is None
+
+
+@pytest.mark.parametrize('size', [1, 3, 7, 64, len(PAGE)])
+def test_read_first_element_across_chunk_boundaries(size):
+    assert read_first_element(chunked(PAGE, size), 'div', 'timeline-item') == \
+        first_element_html(PAGE, 'div', 'timeline-item')
+
+
+def test_read_first_element_stops_reading():
+    consumed = []
+
+    def chunks():
+        for chunk in chunked(PAGE, 16):
+            consumed.append(chunk)
+            yield chunk
+        raise AssertionError('读完了整个页面')
+
+    read_first_element(chunks(), 'div', 'timeline-item')
+    assert len(consumed) < len(chunked(PAGE, 16))
+
+
+def test_read_first_element_without_match_returns_everything():
+    assert read_first_element(chunked(PAGE, 10), 'div', 'missing') == PAGE
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_parse_first_element(backend):
+    item = parse_first_element(PAGE, 'div', 'timeline-item', backend=backend)
+    assert item.classes() == ['timeline-item', 'pinned']
+    assert item.find('a', 'tweet-link').get('href') == '/u/status/1'
+    assert item.find('div', 'tweet-content').text() == '第一条'
+    assert item.find('img') is None
+    assert parse_first_element(PAGE, 'div', 'missing', backend=backend) is None
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""响应缓存：缓存规则、过期、按大小淘汰和适配器"""
+
+import time
+import requests
+from requests.adapters import BaseAdapter
+from http_cache import HTTPCache, cache_key, ttl_for
+
+CACHED_URL = 'https://api.bilibili.com/x/space/acc/info?mid=1'
+
+
+class CountingAdapter(BaseAdapter):
+    """本地传输层：返回固定的响应并记录请求次数"""
+
+    def __init__(self, status=200, body=b'{"code": 0}'):
+        super().__init__()
+        self.status = status
+        self.body = body
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        response = requests.Response()
+        response.status_code = self.status
+        response.headers['Content-Type'] = 'application/json'
+        response._content = self.body
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def test_cache_rules():
+    assert ttl_for(CACHED_URL) == 24 * 3600
+    assert ttl_for('https://api.bilibili.com/x/space/arc/search?mid=1') is None
+    assert cache_key('GET', CACHED_URL) != cache_key('GET', CACHED_URL, {'Cookie': 'a=1'})
+
+
+def test_put_get_and_expiry(tmp_path):
+    cache = HTTPCache(str(tmp_path / 'http_cache.db'))
+    key = cache_key('GET', CACHED_URL)
+    cache.put(key, CACHED_URL, 200, {'Content-Type': 'application/json', 'Content-Length': '11'}, b'{"code": 0}', 60)
+    status, headers, body = cache.get(key)
+    assert (status, body) == (200, b'{"code": 0}')
+    assert 'Content-Length' not in headers
+    cache.put(key, CACHED_URL, 200, {}, b'old', 0.01)
+    time.sleep(0.02)
+    assert cache.get(key) is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = HTTPCache(str(tmp_path / 'http_cache.db'), max_bytes=25)
+    for name in ('a', 'b'):
+        cache.put(name, name, 200, {}, b'x' * 10, 60)
+        time.sleep(0.01)
+    # 访问 a 之后，超出上限时先淘汰 b
+    assert cache.get('a')
+    cache.put('c', 'c', 200, {}, b'x' * 10, 60)
+    assert cache.get('a') and cache.get('c')
+    assert cache.get('b') is None
+
+
+def test_adapter_serves_repeated_gets_from_cache(tmp_path):
+    cache = HTTPCache(str(tmp_path / 'http_cache.db'))
+    transport = CountingAdapter()
+    session = requests.Session()
+    session.mount('https://', transport)
+    cache.mount(session)
+
+    assert session.get(CACHED_URL).json() == {'code': 0}
+    response = session.get(CACHED_URL)
+    assert response.json() == {'code': 0}
+    assert response.headers['X-Cache'] == 'HIT'
+    assert transport.calls == 1
+    # 不匹配缓存规则的请求每次都经过原来的适配器
+    session.get('https://api.bilibili.com/x/space/arc/search?mid=1')
+    session.get('https://api.bilibili.com/x/space/arc/search?mid=1')
+    assert transport.calls == 3
+
+
+def test_adapter_does_not_cache_errors(tmp_path):
+    cache = HTTPCache(str(tmp_path / 'http_cache.db'))
+    transport = CountingAdapter(status=503, body=b'')
+    session = requests.Session()
+    session.mount('https://', transport)
+    cache.mount(session)
+    session.get(CACHED_URL)
+    session.get(CACHED_URL)
+    assert transport.calls == 2
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""通过 http_cassette 命令行运行脚本：回放时请求只来自录制文件，录制时请求仍经过会话原来的适配器"""
+
+import os
+import sys
+import json
+import subprocess
+import textwrap
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 回放时运行的脚本：检查录制文件已安装、会话使用录制/回放适配器，并打印回放的响应
+PROBE_SCRIPT = textwrap.dedent("""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from http_cassette import active_cassette, CassetteAdapter
+    from http_session import create_session
+
+    assert active_cassette() is not None, 'active: None'
+    # 先按主机挂载了其他适配器的会话，挂载录制文件后同样只经过录制/回放适配器
+    mounted = requests.Session()
+    mounted.mount('https://api.bilibili.com/', HTTPAdapter())
+    active_cassette().mount(mounted)
+    for session in (requests.Session(), create_session(), create_session(cache=True), mounted):
+        for prefix, adapter in session.adapters.items():
+            assert isinstance(adapter, CassetteAdapter), (prefix, type(adapter).__name__)
+        print(session.get('https://api.bilibili.com/x/space/acc/info?mid=1').json()['code'])
+""")
+
+# 录制时运行的脚本：检查录制/回放适配器包装了 create_session 的超时、重试和限速适配器
+RECORD_SCRIPT = textwrap.dedent("""
+    import sys
+    from http_cassette import CassetteAdapter
+    from http_session import create_session, TimeoutHTTPAdapter
+
+    url = sys.argv[1]
+    session = create_session()
+    adapter = session.get_adapter(url)
+    assert isinstance(adapter, CassetteAdapter), type(adapter).__name__
+    assert isinstance(adapter.adapter, TimeoutHTTPAdapter), type(adapter.adapter).__name__
+    print(session.get(url).json()['code'])
+""")
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({'code': 54321}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_replay_uses_only_cassette(tmp_path):
+    cassette = tmp_path / 'cassette.jsonl'
+    url = 'https://api.bilibili.com/x/space/acc/info?mid=1'
+    entry = {
+        'key': f"GET {url} e3b0c44298fc1c14",
+        'method': 'GET',
+        'url': url,
+        'status': 200,
+        'reason': 'OK',
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps({'code': 12345}),
+    }
+    cassette.write_text(json.dumps(entry) + '\n', encoding='utf-8')
+    script = tmp_path / 'probe.py'
+    script.write_text(PROBE_SCRIPT, encoding='utf-8')
+
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'http_cassette.py'), '--cassette', str(cassette), 'replay', str(script)],
+        cwd=tmp_path, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split().count('12345') == 4
+
+
+def test_record_delegates_to_session_adapters(tmp_path):
+    server = HTTPServer(('127.0.0.1', 0), JSONHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/info"
+    cassette = tmp_path / 'cassette.jsonl'
+    script = tmp_path / 'record.py'
+    script.write_text(RECORD_SCRIPT, encoding='utf-8')
+
+    try:
+        result = subprocess.run(
+            [sys.executable, os.path.join(ROOT, 'http_cassette.py'), '--cassette', str(cassette),
+             'record', str(script), url],
+            cwd=tmp_path, capture_output=True, text=True, timeout=60
+        )
+    finally:
+        server.shutdown()
+    assert result.returncode == 0, result.stderr
+    assert '54321' in result.stdout.split()
+    entries = [json.loads(line) for line in cassette.read_text(encoding='utf-8').splitlines()]
+    assert [(entry['url'], entry['status']) for entry in entries] == [(url, 200)]
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Nitter 实例健康表：排序、熔断、冷却后的试探和保存"""
+
+from nitter_health import InstanceHealth, FAILURE_THRESHOLD, COOLDOWN_BASE
+
+
+def trip(health, instance, now):
+    """连续失败直到熔断，返回冷却秒数"""
+    cooldowns = [health.record_failure(instance, 'timeout', now=now) for _ in range(FAILURE_THRESHOLD)]
+    assert cooldowns[:-1] == [0] * (FAILURE_THRESHOLD - 1)
+    return cooldowns[-1]
+
+
+def test_ranked_prefers_healthy_fast_instances(tmp_path):
+    health = InstanceHealth(str(tmp_path / 'health.json'))
+    health.record_success('https://fast', 0.2)
+    health.record_success('https://slow', 5.0)
+    health.record_failure('https://flaky', 'timeout')
+    assert health.ranked(['https://slow', 'https://flaky', 'https://fast']) == [
+        'https://fast', 'https://slow', 'https://flaky'
+    ]
+
+
+def test_breaker_opens_and_half_opens(tmp_path):
+    health = InstanceHealth(str(tmp_path / 'health.json'))
+    now = 1000.0
+    assert trip(health, 'https://a', now) == COOLDOWN_BASE
+    assert health.ranked(['https://a', 'https://b'], now=now + 1) == ['https://b']
+
+    # 冷却结束后半开：放行试探请求，再次失败时立即重新熔断且冷却时间翻倍
+    later = now + COOLDOWN_BASE + 1
+    assert 'https://a' in health.ranked(['https://a', 'https://b'], now=later)
+    assert health.record_failure('https://a', 'timeout', now=later) == COOLDOWN_BASE * 2
+
+    # 试探成功后关闭熔断
+    health.record_success('https://a', 0.5)
+    assert 'https://a' in health.ranked(['https://a'], now=later + 1)
+    assert trip(health, 'https://a', later + 2) == COOLDOWN_BASE
+
+
+def test_all_open_returns_earliest_to_recover(tmp_path):
+    health = InstanceHealth(str(tmp_path / 'health.json'))
+    trip(health, 'https://a', 1000.0)
+    trip(health, 'https://b', 2000.0)
+    assert health.ranked(['https://a', 'https://b'], now=2001.0) == ['https://a']
+
+
+def test_save_and_reload(tmp_path):
+    path = str(tmp_path / 'health.json')
+    health = InstanceHealth(path)
+    health.record_success('https://a', 0.3)
+    trip(health, 'https://b', 1000.0)
+    health.save()
+
+    reloaded = InstanceHealth(path)
+    assert reloaded.instances == health.instances
+    assert reloaded.ranked(['https://a', 'https://b'], now=1001.0) == ['https://a']
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""只在内容变化时写入文件"""
+
+from output_writer import OutputWriter
+
+
+def test_write_text_skips_unchanged(tmp_path):
+    path = str(tmp_path / 'index.html')
+    writer = OutputWriter()
+    assert writer.write_text(path, '<p>仪表板</p>\n')
+    assert writer.has_changes()
+
+    writer = OutputWriter()
+    assert not writer.write_text(path, '<p>仪表板</p>\n')
+    assert writer.is_text_unchanged(path, '<p>仪表板</p>\n')
+    assert not writer.has_changes()
+    assert writer.write_text(path, '<p>新内容</p>\n')
+    assert writer.has_changes()
+    assert not (tmp_path / 'index.html.tmp').exists()
+
+
+def test_copy_skips_identical_target(tmp_path):
+    source = tmp_path / 'template.html'
+    target = tmp_path / 'docs_template.html'
+    source.write_bytes(b'template')
+    writer = OutputWriter()
+    assert writer.copy(str(source), str(target))
+    assert not writer.copy(str(source), str(target))
+    source.write_bytes(b'changed')
+    assert writer.copy(str(source), str(target))
+    assert target.read_bytes() == b'changed'
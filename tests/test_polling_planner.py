@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""自适应抓取计划：到期判断、每小时预算和发布历史"""
+
+from polling_planner import PollingPlanner, MIN_INTERVAL
+
+HOUR = 3600
+NOW = 1_000_000.0
+
+
+def planner(tmp_path, **kwargs):
+    return PollingPlanner(state_file=str(tmp_path / 'polling_state.json'), **kwargs)
+
+
+def test_new_authors_are_due_within_budget(tmp_path):
+    plan = planner(tmp_path, budget_per_hour=3)
+    selected = plan.plan({'youtube': ['a', 'b'], 'x': ['c', 'd']}, now=NOW)
+    assert sum(len(authors) for authors in selected.values()) == 3
+    # 预算在一小时内已用完
+    assert plan.plan({'youtube': ['a', 'b'], 'x': ['c', 'd']}, now=NOW + 60) == {'youtube': [], 'x': []}
+    # 一小时后恢复
+    assert sum(len(authors) for authors in plan.plan({'x': ['d']}, now=NOW + HOUR + 1).values()) == 1
+
+
+def test_frequent_authors_are_polled_sooner(tmp_path):
+    plan = planner(tmp_path)
+    item = [{'url': 'https://example.com/1'}]
+    # 每 2 小时发一条的作者和每周一条的作者
+    plan.observe('youtube', 'busy', item, [NOW - 2 * HOUR * i for i in range(5)], now=NOW)
+    plan.observe('youtube', 'quiet', item, [NOW - 7 * 24 * HOUR * i for i in range(5)], now=NOW)
+    authors = {'youtube': ['busy', 'quiet']}
+    assert plan.plan(authors, now=NOW + MIN_INTERVAL - 1) == {'youtube': []}
+    assert plan.plan(authors, now=NOW + 2 * HOUR) == {'youtube': ['busy']}
+    assert plan.plan(authors, now=NOW + 14 * HOUR) == {'youtube': ['busy', 'quiet']}
+
+
+def test_observe_tracks_url_changes_without_times(tmp_path):
+    plan = planner(tmp_path)
+    plan.observe('wechat', 'a', [{'url': 'https://example.com/1'}], [None], now=NOW)
+    plan.observe('wechat', 'a', [{'url': 'https://example.com/2'}], [None], now=NOW + HOUR)
+    state = plan.author_state('wechat', 'a')
+    assert state['published'] == [NOW + HOUR]
+    assert plan.last_items('wechat', 'a') == [{'url': 'https://example.com/2'}]
+    # 没有内容的抓取不更新状态
+    plan.observe('wechat', 'a', [], [], now=NOW + 2 * HOUR)
+    assert state['last_poll'] == NOW + HOUR
+
+
+def test_state_survives_reload(tmp_path):
+    plan = planner(tmp_path)
+    plan.observe('x', 'a', [{'url': 'https://example.com/1'}], [NOW - HOUR, NOW], now=NOW)
+    plan.save()
+    reloaded = planner(tmp_path)
+    assert reloaded.authors == plan.authors
+    assert reloaded.mean_gap('x', 'a', NOW) == HOUR
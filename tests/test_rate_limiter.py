@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""按主机限速：令牌补充、限流退避和跨进程共享的状态"""
+
+import pytest
+from rate_limiter import TokenBucket, RateLimiter, SharedRateLimiter, parse_retry_after, BACKOFF_BASE, BACKOFF_MAX
+
+
+def test_bucket_allows_burst_then_waits():
+    bucket = TokenBucket(rate=2.0, burst=3, updated=100.0)
+    assert [bucket.reserve(100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    # 令牌用完后按速率排队，预支的令牌让后面的请求等待更久
+    assert bucket.reserve(100.0) == pytest.approx(0.5)
+    assert bucket.reserve(100.0) == pytest.approx(1.0)
+
+
+def test_bucket_refills_up_to_burst():
+    bucket = TokenBucket(rate=1.0, burst=2, updated=0.0)
+    bucket.reserve(0.0)
+    bucket.reserve(0.0)
+    assert bucket.reserve(1.0) == 0.0
+    # 长时间空闲后最多只积累 burst 个令牌
+    assert bucket.reserve(100.0) == 0.0
+    assert bucket.reserve(100.0) == 0.0
+    assert bucket.reserve(100.0) == pytest.approx(1.0)
+
+
+def test_backoff_doubles_until_success():
+    limiter = RateLimiter(default_rate=(100.0, 100))
+    pauses = [limiter.backoff('https://example.com/a') for _ in range(7)]
+    assert pauses == [min(BACKOFF_MAX, BACKOFF_BASE * 2 ** i) for i in range(7)]
+    # 暂停期间的请求要等到暂停结束
+    assert limiter.reserve('example.com') == pytest.approx(pauses[-1], abs=1.0)
+    limiter.record_success('https://example.com/b')
+    assert limiter.backoff('example.com') == BACKOFF_BASE
+    # Retry-After 优先
+    assert limiter.backoff('example.com', retry_after=7) == 7
+
+
+def test_hosts_are_limited_separately():
+    limiter = RateLimiter(rates={'slow.example': (1.0, 1)})
+    assert limiter.reserve('https://slow.example/1') == 0.0
+    assert limiter.reserve('https://slow.example/2') > 0.5
+    assert limiter.reserve('https://fast.example/1') == 0.0
+
+
+def test_shared_limiter_state_is_shared(tmp_path):
+    path = str(tmp_path / 'rate_limits.db')
+    first = SharedRateLimiter(path, rates={'api.example': (1.0, 1)})
+    second = SharedRateLimiter(path, rates={'api.example': (1.0, 1)})
+    assert first.reserve('api.example') == 0.0
+    # 另一个进程（这里用另一个连接模拟）从同一个预算中取令牌
+    assert second.reserve('api.example') > 0.5
+    first.backoff('api.example')
+    assert second.backoff('api.example') == BACKOFF_BASE * 2
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after('-5') == 0.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') is None
+    assert parse_retry_after(None) is None
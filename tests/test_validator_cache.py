@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""条件请求缓存：请求头、解析结果和保存"""
+
+from validator_cache import ValidatorCache
+
+URL = 'https://nitter.example/user/rss'
+
+
+def test_headers_only_with_cached_result(tmp_path):
+    cache = ValidatorCache(str(tmp_path / 'validators.json'))
+    assert cache.request_headers(URL) == {}
+    cache.update(URL, '"v1"', 'Wed, 21 Oct 2015 07:28:00 GMT', {'title': '推文'})
+    assert cache.request_headers(URL) == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT',
+    }
+    assert cache.cached_result(URL) == {'title': '推文'}
+    # 没有解析结果时不发送条件请求，避免收到 304 却没有可用的结果
+    cache.update(URL, '"v2"', None, None)
+    assert cache.request_headers(URL) == {}
+
+
+def test_missing_validators_and_forget_drop_entry(tmp_path):
+    cache = ValidatorCache(str(tmp_path / 'validators.json'))
+    cache.update(URL, '"v1"', None, {'title': 'a'})
+    cache.update(URL, None, None, {'title': 'b'})
+    assert cache.cached_result(URL) is None
+    cache.update(URL, '"v1"', None, {'title': 'a'})
+    cache.forget(URL)
+    assert cache.cached_result(URL) is None
+    assert cache.request_headers(URL) == {}
+
+
+def test_reload_and_corrupt_file(tmp_path):
+    path = tmp_path / 'validators.json'
+    cache = ValidatorCache(str(path))
+    cache.update(URL, '"v1"', None, {'title': 'a'})
+    assert ValidatorCache(str(path)).cached_result(URL) == {'title': 'a'}
+    path.write_text('{not json', encoding='utf-8')
+    assert ValidatorCache(str(path)).entries == {}
@@ -2,17 +2,27 @@
 # -*- coding: utf-8 -*-
 
 import os
-import json
 import logging
 from datetime import datetime
-import requests
 from dotenv import load_dotenv
+from metrics import get_metrics, write_report
+from content_store import get_store
+from http_session import create_session
+
+metrics = get_metrics('twitter')
+
+# 需要获取推文的用户名列表
+USERNAMES = [
+    'op7418',
+]
 
 class TwitterScraper:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.base_url = "https://api.twitter.com/2"
         self.bearer_token = os.getenv('TWITTER_BEARER_TOKEN')
+        # 用户名对应的用户ID几乎不会变化，查询结果使用共享的响应缓存
+        self.session = create_session(cache=True)
         
     def get_user_id(self, username):
         """获取用户ID"""
@@ -23,7 +33,8 @@ class TwitterScraper:
         }
         
         try:
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url, headers=headers)
+            metrics.record_response(response)
             if response.status_code == 200:
                 return response.json()['data']['id']
             else:
@@ -48,7 +59,8 @@ class TwitterScraper:
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = self.session.get(url, headers=headers, params=params)
+            metrics.record_response(response)
             if response.status_code == 200:
                 return response.json()
             else:
@@ -106,15 +118,32 @@ class TwitterScraper:
                 continue
                 
         return processed_tweets
+    
+    def get_latest_tweets(self, username):
+        """获取单个用户的最新推文，返回处理后的推文列表"""
+        user_id = self.get_user_id(username)
+        if not user_id:
+            print(f"未能获取到用户 {username} 的ID")
+            return []
+        
+        print(f"\n开始获取用户 {username} 的推文")
+        tweets_data = self.get_user_tweets(user_id)
+        if not tweets_data:
+            print(f"\n未能获取到用户 {username} 的推文")
+            return []
+        
+        tweets = self.process_tweets(tweets_data)
+        for tweet in tweets:
+            tweet['author'] = username
+        return tweets
             
-    def save_tweets_to_json(self, tweets, output_file='twitter_posts.json'):
-        """保存推文信息到JSON文件"""
+    def save_tweets(self, tweets):
+        """保存推文信息到内容库"""
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(tweets, f, ensure_ascii=False, indent=2)
-            self.logger.info(f"已保存推文信息到 {output_file}")
+            count = get_store().upsert_items('twitter', tweets)
+            self.logger.info(f"已保存 {count} 条推文到内容库")
         except Exception as e:
-            self.logger.error(f"保存JSON文件时出错: {str(e)}")
+            self.logger.error(f"保存到内容库时出错: {str(e)}")
             
     def generate_html(self, tweets, output_file='twitter_posts.html'):
         """生成推文列表的HTML内容"""
@@ -164,36 +193,25 @@ class TwitterScraper:
         try:
             # 加载环境变量
             load_dotenv()
+            self.bearer_token = self.bearer_token or os.getenv('TWITTER_BEARER_TOKEN')
             
             if not self.bearer_token:
                 print("错误：未在.env文件中找到TWITTER_BEARER_TOKEN配置")
                 return
             
-            # 获取用户ID
-            username = "op7418"
-            user_id = self.get_user_id(username)
-            
-            if not user_id:
-                print(f"未能获取到用户 {username} 的ID")
-                return
-            
-            # 获取用户推文
-            print(f"\n开始获取用户 {username} 的推文")
-            tweets_data = self.get_user_tweets(user_id)
+            # 获取每个用户的推文
+            processed_tweets = []
+            for username in USERNAMES:
+                with metrics.track():
+                    processed_tweets.extend(self.get_latest_tweets(username))
             
-            if tweets_data:
-                # 处理推文数据
-                processed_tweets = self.process_tweets(tweets_data)
-                
-                if processed_tweets:
-                    # 保存推文信息
-                    self.save_tweets_to_json(processed_tweets)
-                    self.generate_html(processed_tweets)
-                    print(f"\n总计获取到 {len(processed_tweets)} 条推文")
-                else:
-                    print("\n未能获取到任何推文信息")
+            if processed_tweets:
+                # 保存推文信息
+                self.save_tweets(processed_tweets)
+                self.generate_html(processed_tweets)
+                print(f"\n总计获取到 {len(processed_tweets)} 条推文")
             else:
-                print(f"\n未能获取到用户 {username} 的推文")
+                print("\n未能获取到任何推文信息")
             
         except Exception as e:
             self.logger.error(f"运行爬虫时出错: {str(e)}")
@@ -212,6 +230,7 @@ def main():
     
     scraper = TwitterScraper()
     scraper.run_scraper()
+    write_report('twitter_run_report.json', names=['twitter'])
 
 if __name__ == "__main__":
     main()
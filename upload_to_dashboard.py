@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import requests
 import json
 import base64
 from datetime import datetime
 import logging
 import os
+from content_store import get_store, platform_id_of
+from http_session import create_session
 
 class DashboardUploader:
     def __init__(self):
@@ -30,6 +31,7 @@ class DashboardUploader:
         self.repo_owner = "aoqing16"
         self.repo_name = "dashboard-demo"
         self.branch = "main"  # 或者是 "master"，取决于仓库设置
+        self.session = create_session()
 
     def setup_logging(self):
         """设置日志"""
@@ -50,7 +52,7 @@ class DashboardUploader:
             "Accept": "application/vnd.github.v3+json"
         }
         
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url, headers=headers)
         if response.status_code == 200:
             return response.json()
         elif response.status_code == 404:
@@ -80,35 +82,34 @@ class DashboardUploader:
             data["sha"] = current_file["sha"]
         
         # 发送请求
-        response = requests.put(url, headers=headers, json=data)
+        response = self.session.put(url, headers=headers, json=data)
         response.raise_for_status()
         return response.json()
 
     def process_bilibili_data(self):
         """处理B站数据并上传到仪表盘"""
         try:
-            # 读取B站视频数据
-            with open('bilibili_videos.json', 'r', encoding='utf-8') as f:
-                videos = json.load(f)
+            # 从内容库读取最新的B站视频
+            videos = get_store().recent_items('bilibili', limit=1)
             
             if not videos:
-                self.logger.warning("No videos found in bilibili_videos.json")
+                self.logger.warning("No bilibili videos found in content store")
                 return
             
-            # 获取最新的视频
             latest_video = videos[0]
+            platform_id = platform_id_of(latest_video)
             
-            # 准备要上传的数据
+            # 准备要上传的数据（不同B站爬虫保存的字段略有不同）
             dashboard_data = {
                 "title": latest_video['title'],
                 "platform": "bilibili",
-                "views": latest_video['play'],
-                "comments": latest_video['comment'],
-                "url": f"https://www.bilibili.com/video/{latest_video['bvid']}",
-                "published": latest_video['created'],
-                "thumbnail": latest_video['pic'],
+                "views": latest_video.get('play', 0),
+                "comments": latest_video.get('comment', 0),
+                "url": latest_video.get('url') or f"https://www.bilibili.com/video/{platform_id}",
+                "published": latest_video.get('created') or latest_video.get('time'),
+                "thumbnail": latest_video.get('pic') or latest_video.get('thumbnail'),
                 "author": latest_video['author'],
-                "platform_id": latest_video['bvid'],
+                "platform_id": platform_id,
                 "updated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
             
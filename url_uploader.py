@@ -1,21 +1,34 @@
 import re
 import os
 import json
+import asyncio
 from datetime import datetime
 import time
 from bilibili_api import video, sync
-import requests
 from urllib.parse import urlparse
 import shutil
 import feedparser
 from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
 import subprocess
+from content_store import get_store, UPLOADS
+from content_journal import ContentJournal
+from validator_cache import get_validator_cache
+from http_session import create_session
+from rate_limiter import get_rate_limiter
+
+# 列出尚未发布的内容时最多显示的条数（通过日志的偏移索引读取，不解析整个日志）
+PENDING_PREVIEW = 10
+
+# 日志中未发布的内容达到这个条数时才合并到 data.json 并推送，其余的在退出时一起发布
+PUBLISH_THRESHOLD = 10
 
 class URLUploader:
     def __init__(self):
         """初始化上传器"""
         self.setup_paths()
+        self.session = create_session()
+        self.import_data_file()
         self.setup_browser_config()
         self.setup_special_authors()
         self.platform_patterns = {
@@ -33,6 +46,8 @@ class URLUploader:
         self.docs_dir = os.path.join(self.repo_dir, 'docs')
         self.images_dir = os.path.join(self.docs_dir, 'images')
         self.data_file = os.path.join(self.docs_dir, 'data.json')
+        # 新添加的内容先追加到日志，发布时再合并到 data.json（日志不放在会被 git reset 的仓库目录中）
+        self.journal = ContentJournal(os.path.join(self.base_dir, 'uploads_journal.jsonl'))
         
         # 确保目录存在
         os.makedirs(self.repo_dir, exist_ok=True)
@@ -80,11 +95,16 @@ class URLUploader:
                 with open(os.path.join(self.images_dir, '.gitkeep'), 'w') as f:
                     pass
                 
+                # 将日志中的新内容合并到 data.json
+                merged = self.compact_journal()
+                
                 # 添加并提交所有更改
                 subprocess.run(['git', 'add', '-A'], check=True)
                 subprocess.run(['git', 'commit', '-m', message], check=True)
                 subprocess.run(['git', 'push', '-f', 'origin', 'main'], check=True)
                 
+                # 推送成功后才删除已合并的日志，失败时下次发布会重新合并
+                self.journal.clear(merged)
                 print("更改已推送到仪表盘")
             finally:
                 os.chdir(original_dir)
@@ -139,15 +159,27 @@ class URLUploader:
             }
         }
 
+    def import_data_file(self):
+        """内容库中还没有手动添加的内容时，导入已有的 data.json"""
+        store = get_store()
+        if store.platforms(UPLOADS) or not os.path.exists(self.data_file):
+            return
+        with open(self.data_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for platform, items in data.items():
+            # data.json 中最新的在前，倒序写入以保持先后顺序
+            store.upsert_items(platform, list(reversed(items)), collection=UPLOADS)
+        print(f"已将 {self.data_file} 导入内容库")
+
     def load_data(self):
-        """加载现有数据"""
+        """加载发布用的数据快照（data.json）"""
         if os.path.exists(self.data_file):
             with open(self.data_file, 'r', encoding='utf-8') as f:
                 return json.load(f)
         return {"youtube": [], "bilibili": [], "twitter": [], "podcast": [], "xiaohongshu": []}
 
     def save_data(self, data):
-        """保存数据到JSON文件"""
+        """保存发布用的数据快照（data.json）"""
         os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
         with open(self.data_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
@@ -164,7 +196,7 @@ class URLUploader:
         try:
             # 处理短链接
             if 'b23.tv' in url:
-                response = requests.get(url, allow_redirects=True)
+                response = self.session.get(url, allow_redirects=True)
                 url = response.url
 
             # 从URL中提取视频ID
@@ -174,6 +206,8 @@ class URLUploader:
                 return None
 
             bv_id = match.group()
+            # bilibili_api 不经过共享会话，手动从 api.bilibili.com 的限速预算中取令牌
+            await asyncio.to_thread(get_rate_limiter().acquire, 'api.bilibili.com')
             v = video.Video(bvid=bv_id)
             info = await v.get_info()
 
@@ -225,8 +259,13 @@ class URLUploader:
                         'platform': 'podcast'
                     }
             else:
-                # 处理RSS feed URL
-                feed = feedparser.parse(url)
+                # 处理RSS feed URL（条件请求，feed 未变化时不再解析）
+                cache = get_validator_cache()
+                etag, modified = cache.validators(url)
+                feed = feedparser.parse(url, etag=etag, modified=modified)
+                if feed.get('status') == 304:
+                    print("播客 feed 未变化，使用上次的结果")
+                    return cache.cached_result(url)
                 if feed.bozo:  # 如果解析出错
                     return None
                 
@@ -234,12 +273,14 @@ class URLUploader:
                 if not latest_episode:
                     return None
 
-                return {
+                info = {
                     'title': latest_episode.title,
                     'author': feed.feed.author if hasattr(feed.feed, 'author') else feed.feed.title,
                     'description': latest_episode.description if hasattr(latest_episode, 'description') else '',
                     'platform': 'podcast'
                 }
+                cache.update(url, feed.get('etag'), feed.get('modified'), info)
+                return info
         except Exception as e:
             print(f"获取播客信息时出错: {str(e)}")
             return None
@@ -293,7 +334,7 @@ class URLUploader:
             url = url.replace('x.com', 'vxtwitter.com')
             url = url.replace('twitter.com', 'vxtwitter.com')
             
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url, headers=headers)
             response.raise_for_status()
             
             # vxtwitter返回JSON格式的数据
@@ -336,7 +377,7 @@ class URLUploader:
     def download_image(self, url, platform):
         """下载图片到仪表盘目录"""
         try:
-            response = requests.get(url, stream=True)
+            response = self.session.get(url, stream=True)
             response.raise_for_status()
             
             # 生成唯一的文件名
@@ -357,19 +398,50 @@ class URLUploader:
             return None
 
     def add_content(self, platform, content):
-        """添加内容到数据文件"""
-        data = self.load_data()
-        if platform not in data:
-            data[platform] = []
-        
+        """添加内容：追加到日志并写入内容库，不重写 data.json"""
         # 添加时间戳
         content['timestamp'] = datetime.now().isoformat()
         
-        # 将新内容添加到列表开头
-        data[platform].insert(0, content)
+        self.journal.append({'platform': platform, 'content': content})
+        get_store().upsert_items(platform, [content], collection=UPLOADS)
+
+    def show_pending(self, count=PENDING_PREVIEW):
+        """列出日志中尚未发布的内容（最新的在前，只读取最近 count 条），返回未发布的总条数"""
+        pending = len(self.journal)
+        if not pending:
+            return 0
+        print(f"有 {pending} 条内容尚未发布:")
+        for entry in self.journal.recent(count):
+            print(f"  [{entry['platform']}] {str(entry['content'].get('title', ''))[:50]}")
+        if pending > count:
+            print(f"  ……以及更早的 {pending - count} 条")
+        return pending
+
+    def publish_if_due(self, threshold=PUBLISH_THRESHOLD):
+        """未发布的内容达到 threshold 条时合并并推送，返回是否发布"""
+        pending = len(self.journal)
+        if pending < threshold:
+            print(f"已追加到日志（{pending}/{threshold} 条后发布）")
+            return False
+        self.commit_and_push(f"添加 {pending} 条新内容")
+        return True
+
+    def compact_journal(self):
+        """将日志中的内容合并到 data.json（每个平台最新的在前），返回合并的条数"""
+        entries = self.journal.entries()
+        if not entries:
+            return 0
+        
+        added = {}
+        for entry in entries:
+            added.setdefault(entry['platform'], []).append(entry['content'])
         
-        # 保存更新后的数据
+        data = self.load_data()
+        for platform, contents in added.items():
+            data[platform] = list(reversed(contents)) + data.get(platform, [])
         self.save_data(data)
+        print(f"已将 {len(entries)} 条新内容合并到 {self.data_file}")
+        return len(entries)
 
     def process_url(self, url):
         """处理输入的URL"""
@@ -392,20 +464,6 @@ class URLUploader:
             os.makedirs(self.docs_dir, exist_ok=True)
             os.makedirs(self.images_dir, exist_ok=True)
             
-            # 读取现有数据
-            data_file = os.path.join(self.docs_dir, 'data.json')
-            if os.path.exists(data_file):
-                with open(data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-            else:
-                data = {
-                    'youtube': [],
-                    'bilibili': [],
-                    'twitter': [],
-                    'xiaohongshu': [],
-                    'podcast': []
-                }
-            
             # 准备新内容
             new_content = {
                 'title': title,
@@ -425,23 +483,23 @@ class URLUploader:
                 shutil.copy2(image_path, target_path)
                 new_content['thumbnail'] = f'docs/images/{image_filename}'
             
-            # 添加新内容到对应平台
+            # 添加新内容到对应平台（发布时合并到 data.json）
+            platform = None
             if 'twitter.com' in url or 'x.com' in url:
-                data['twitter'].insert(0, new_content)
+                platform = 'twitter'
             elif 'bilibili.com' in url:
-                data['bilibili'].insert(0, new_content)
+                platform = 'bilibili'
             elif 'youtube.com' in url:
-                data['youtube'].insert(0, new_content)
+                platform = 'youtube'
             elif 'xiaohongshu.com' in url:
-                data['xiaohongshu'].insert(0, new_content)
+                platform = 'xiaohongshu'
             
-            # 保存更新后的数据
-            with open(data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            if platform:
+                self.journal.append({'platform': platform, 'content': new_content})
+                get_store().upsert_items(platform, [new_content], collection=UPLOADS)
             
-            # 提交更改
-            commit_message = f'添加新内容: {title}'
-            self.commit_and_push(commit_message)
+            # 积累到一定条数后再批量发布
+            self.publish_if_due()
             
             print("内容已成功保存")
             
@@ -449,11 +507,11 @@ class URLUploader:
             print(f"保存内容时出错: {str(e)}")
 
 if __name__ == "__main__":
-    import asyncio
-    
     async def main():
         uploader = URLUploader()
         uploader.ensure_repo()
+        # 上次发布失败时留在日志中的内容会随下一次发布一起合并
+        uploader.show_pending()
         
         while True:
             url = input("请输入URL（直接按回车退出）: ").strip()
@@ -500,11 +558,16 @@ if __name__ == "__main__":
                     if image_filename:
                         info['image'] = f'images/{image_filename}'
                 
-                # 添加到数据文件
+                # 只追加到日志，积累到一定条数后再批量发布（发布时合并到 data.json）
                 uploader.add_content(platform, info)
-                uploader.commit_and_push(f"添加新内容: {info['title'][:50]}")
+                uploader.publish_if_due()
                 print("内容已成功保存")
             else:
                 print(f"无法获取{platform}平台的信息")
+        
+        # 退出前发布尚未发布的内容（包括上次发布失败的）
+        pending = uploader.show_pending()
+        if pending:
+            uploader.commit_and_push(f"添加 {pending} 条新内容")
 
     asyncio.run(main())
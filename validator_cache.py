@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import threading
+
+# 每个URL的 ETag / Last-Modified 以及对应的解析结果
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'http_validators.json')
+
+
+class ValidatorCache:
+    """条件请求缓存：保存每个URL上次响应的校验信息和解析结果
+
+    请求时带上 If-None-Match / If-Modified-Since，服务器返回 304 时直接使用上次的解析结果，
+    不再下载和解析页面。只有保存了解析结果的URL才会发送条件请求。
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"读取条件请求缓存失败，将重新建立: {str(e)}")
+            self.entries = {}
+
+    def save(self):
+        """原子写入缓存文件（调用方需持有 lock）"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, self.path)
+
+    def validators(self, url):
+        """返回 (etag, last_modified)，没有可用的缓存结果时都为 None"""
+        with self.lock:
+            entry = self.entries.get(url)
+            if not entry or entry.get('result') is None:
+                return None, None
+            return entry.get('etag'), entry.get('last_modified')
+
+    def request_headers(self, url):
+        """条件请求头"""
+        etag, last_modified = self.validators(url)
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def cached_result(self, url):
+        """上次保存的解析结果（收到 304 时使用）"""
+        with self.lock:
+            entry = self.entries.get(url)
+            return entry.get('result') if entry else None
+
+    def update(self, url, etag, last_modified, result):
+        """保存新的校验信息和解析结果；服务器没有返回校验信息时删除该URL的缓存"""
+        with self.lock:
+            if etag or last_modified:
+                self.entries[url] = {'etag': etag, 'last_modified': last_modified, 'result': result}
+            elif self.entries.pop(url, None) is None:
+                return
+            try:
+                self.save()
+            except OSError as e:
+                print(f"保存条件请求缓存失败: {str(e)}")
+
+    def forget(self, url):
+        """删除该URL的校验信息和解析结果，之后的请求不再带条件请求头"""
+        self.update(url, None, None, None)
+
+    def update_from_response(self, url, response, result):
+        """根据 requests 的响应头保存校验信息"""
+        self.update(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), result)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_validator_cache():
+    """进程内共用的条件请求缓存"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ValidatorCache()
+        return _cache
@@ -2,12 +2,20 @@ import os
 import json
 import time
 import random
-import requests
 from datetime import datetime
 import webbrowser
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 import urllib.parse
+from metrics import get_metrics, write_report
+from http_session import create_session
+
+metrics = get_metrics('wechat')
+
+# 需要获取文章的公众号名称列表
+ACCOUNTS = [
+    '请辩',
+]
 
 class WeChatScraper:
     def __init__(self):
@@ -17,16 +25,14 @@ class WeChatScraper:
         
     def _create_session(self):
         """创建一个带有请求头的会话"""
-        session = requests.Session()
-        session.headers.update({
+        return create_session(headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'application/json',
             'Content-Type': 'application/json'
-        })
-        return session
+        }, metrics=metrics)
     
-    def get_latest_articles(self, account_name, num_pages=1):
-        """获取公众号最新文章"""
+    def get_latest_articles(self, account_name, num_pages=1, save_html=True):
+        """获取公众号最新文章（save_html=False 时不生成并打开HTML页面）"""
         try:
             print(f"正在获取公众号 {account_name} 的最新文章...")
             articles = []
@@ -117,7 +123,8 @@ class WeChatScraper:
                 return None
             
             if articles:
-                self._generate_html(articles)
+                if save_html:
+                    self._generate_html(articles)
                 print(f"\n共获取到 {len(articles)} 篇文章")
                 return articles
             else:
@@ -244,9 +251,11 @@ def main():
     scraper = WeChatScraper()
     
     # 获取指定公众号的文章
-    account_name = "请辩"  # 直接使用公众号名称
-    print(f"\n开始获取公众号 '{account_name}' 的文章...")
-    scraper.get_latest_articles(account_name)
+    for account_name in ACCOUNTS:  # 直接使用公众号名称
+        print(f"\n开始获取公众号 '{account_name}' 的文章...")
+        with metrics.track():
+            scraper.get_latest_articles(account_name)
+    write_report('wechat_run_report.json', names=['wechat'])
 
 if __name__ == '__main__':
     main()
@@ -1,141 +1,346 @@
 import os
-import json
 import time
-import random
-import requests
 from datetime import datetime
-from bs4 import BeautifulSoup
+from html import unescape
 import feedparser
 import re
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from metrics import get_metrics, write_report
+from content_store import get_store
+from validator_cache import get_validator_cache
+from http_session import create_session, iter_text
+from nitter_health import InstanceHealth
+from html_parser import parse_first_element, read_first_element
+
+metrics = get_metrics('x')
+
+def parse_timeline(html, username, base_url, backend=None):
+    """解析Nitter时间线页面，返回第一条推文信息（未找到推文时返回 None）
+
+    只解析第一条推文所在的片段；backend 为 html_parser 中的解析后端，默认使用最快的可用后端。
+    """
+    # 获取第一条推文
+    tweet_container = parse_first_element(html, 'div', 'timeline-item', backend)
+    if not tweet_container:
+        return None
+
+    # 获取推文内容
+    tweet_content = tweet_container.find('div', 'tweet-content')
+    tweet_text = tweet_content.text() if tweet_content else ''
+
+    # 获取推文时间
+    time_element = tweet_container.find('span', 'tweet-date')
+    tweet_time = None
+    time_link = time_element.find('a') if time_element else None
+    if time_link:
+        time_str = time_link.get('title', '')
+        try:
+            tweet_time = datetime.strptime(time_str, '%b %d, %Y · %I:%M %p UTC')
+        except:
+            print(f"无法解析时间: {time_str}")
+
+    # 获取推文图片
+    tweet_image = None
+    image_container = tweet_container.find('div', 'attachment')
+    if image_container:
+        img = image_container.find('img')
+        if img and img.get('src') is not None:
+            tweet_image = img.get('src')
+            if not tweet_image.startswith('http'):
+                tweet_image = base_url + tweet_image
+
+    # 获取推文统计数据
+    stats = {}
+    stat_container = tweet_container.find('div', 'tweet-stats')
+    if stat_container:
+        for stat in stat_container.find_all('span', 'tweet-stat'):
+            value = stat.find('span', 'tweet-stat-count')
+            icon = stat.find('span', 'icon-')
+            if value and icon:
+                stat_type = icon.classes()[0].replace('icon-', '')
+                stats[stat_type] = value.text()
+
+    # 获取推文链接和ID
+    tweet_link = tweet_container.find('a', 'tweet-link')
+    tweet_id = tweet_link.get('href').split('/')[-1] if tweet_link else None
+
+    return make_tweet_info(username, tweet_id, tweet_text, tweet_time, tweet_image, stats)
+
+def make_tweet_info(username, tweet_id, tweet_text, tweet_time, tweet_image, stats=None):
+    """时间线页面和RSS共用的推文信息格式"""
+    stats = stats or {}
+    return {
+        'title': tweet_text[:100] + ('...' if len(tweet_text) > 100 else ''),
+        'author': username,
+        'url': f"https://twitter.com/{username}/status/{tweet_id}" if tweet_id else f"https://twitter.com/{username}",
+        'thumbnail': tweet_image,
+        'description': tweet_text,
+        'time': tweet_time,
+        'metrics': {
+            'replies': stats.get('reply', '0'),
+            'retweets': stats.get('retweet', '0'),
+            'likes': stats.get('heart', '0'),
+        }
+    }
+
+# RSS 中一条推文的结束标签，截断后用于补全文档的结尾
+FEED_ITEM_END = '</item>'
+FEED_CLOSING = '</channel></rss>'
+
+# 实例没有提供 RSS（已关闭或不存在）时的状态码
+FEED_MISSING_STATUS = (404, 410)
+
+# RSS 推文描述中的图片
+FEED_IMAGE_PATTERN = re.compile(r'<img[^>]*\bsrc="([^"]+)"')
+
+def read_first_feed_item(chunks):
+    """从逐块到达的RSS中截取到第一条推文为止的内容并补全文档结尾，读到第一条推文的结束标签后不再读取
+
+    没有推文时返回全部内容。
+    """
+    xml = ''
+    for chunk in chunks:
+        # 结束标签可能被分在两块中
+        scan_from = max(len(xml) - len(FEED_ITEM_END), 0)
+        xml += chunk
+        end = xml.find(FEED_ITEM_END, scan_from)
+        if end != -1:
+            return xml[:end + len(FEED_ITEM_END)] + FEED_CLOSING
+    return xml
+
+def parse_feed_item(entry, username, base_url):
+    """将Nitter RSS中的一条推文（feedparser 的 entry）转换为推文信息
+
+    RSS 中没有转发、点赞等统计数据，这些值为 '0'。
+    """
+    tweet_text = entry.get('title', '').strip()
+
+    # pubDate 为 UTC 时间
+    published = entry.get('published_parsed')
+    tweet_time = datetime(*published[:6]) if published else None
+
+    tweet_image = None
+    image = FEED_IMAGE_PATTERN.search(entry.get('summary', ''))
+    if image:
+        tweet_image = unescape(image.group(1))
+        if not tweet_image.startswith('http'):
+            tweet_image = base_url + tweet_image
+
+    # 链接格式与时间线页面中的推文链接相同：https://实例/用户名/status/推文ID#m
+    link = entry.get('link')
+    tweet_id = link.split('/')[-1] if link else None
+
+    return make_tweet_info(username, tweet_id, tweet_text, tweet_time, tweet_image)
+
+# 可用的 Nitter 实例（Twitter 的替代前端）
+NITTER_INSTANCES = [
+    'https://nitter.net',
+    'https://nitter.cz',
+    'https://nitter.ca',
+    'https://nitter.it',
+    'https://nitter.nl',
+    'https://nitter.hu',
+    'https://nitter.moomoo.me',
+    'https://nitter.privacydev.net',
+    'https://nitter.poast.org',
+    'https://nitter.unixfox.eu',
+    'https://nitter.foss.wtf',
+    'https://nitter.priv.pw',
+    'https://nitter.tokhmi.xyz',
+    'https://nitter.projectsegfau.lt',
+    'https://nitter.cutelab.space'
+]
+
+# 对冲请求：同时进行的最多实例数，以及前一个实例没有响应时等待多久（秒）再请求下一个实例
+HEDGE_COUNT = 3
+HEDGE_DELAY = 0.5
+
+# 批量获取时同时处理的用户数
+USER_WORKERS = 4
 
 class XScraper:
-    def __init__(self):
+    def __init__(self, hedge=HEDGE_COUNT, hedge_delay=HEDGE_DELAY, workers=USER_WORKERS):
         self.session = self._create_session()
+        # 实例健康记录跨运行保存，失效的实例会被熔断跳过
+        self.health = InstanceHealth()
+        # hedge=1 时逐个尝试实例
+        self.hedge = max(1, hedge)
+        self.hedge_delay = hedge_delay
+        self.workers = max(1, workers)
+        # 对冲请求在线程中进行；落选的请求在后台完成，其结果仍计入实例健康记录
+        self.hedge_pool = ThreadPoolExecutor(max_workers=self.hedge * (self.workers + 1))
         
     def _create_session(self):
         """创建一个带有请求头的会话"""
-        session = requests.Session()
-        session.headers.update({
+        # 实例失败时直接换下一个实例，不在同一实例上重试
+        return create_session(headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'application/rss+xml,application/xml',
-        })
-        return session
+        }, metrics=metrics, retries=0)
     
     def get_user_latest_tweet(self, username):
-        """获取用户最新推文"""
-        # 使用Nitter作为替代前端
-        nitter_instances = [
-            'https://nitter.net',
-            'https://nitter.cz',
-            'https://nitter.ca',
-            'https://nitter.it',
-            'https://nitter.nl',
-            'https://nitter.hu',
-            'https://nitter.moomoo.me',
-            'https://nitter.privacydev.net',
-            'https://nitter.poast.org',
-            'https://nitter.unixfox.eu',
-            'https://nitter.foss.wtf',
-            'https://nitter.priv.pw',
-            'https://nitter.tokhmi.xyz',
-            'https://nitter.projectsegfau.lt',
-            'https://nitter.cutelab.space'
-        ]
-        
-        # 随机打乱实例顺序
-        random.shuffle(nitter_instances)
-        
-        for base_url in nitter_instances:
-            try:
-                print(f"正在尝试使用 {base_url} 获取用户 @{username} 的推文...")
-                
-                url = f"{base_url}/{username}"
-                
-                # 添加随机延迟
-                delay = random.uniform(1, 2)  # 减少延迟时间
-                print(f"等待 {delay:.1f} 秒...")
-                time.sleep(delay)
-                
-                print("正在发送请求...")
-                response = self.session.get(url, timeout=5)  # 减少超时时间
-                response.raise_for_status()
-                
-                print("正在解析页面...")
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # 获取第一条推文
-                tweet_container = soup.find('div', class_='timeline-item')
-                if not tweet_container:
-                    print(f"未找到用户 {username} 的推文，尝试下一个实例...")
-                    continue
-                
-                # 获取推文内容
-                tweet_content = tweet_container.find('div', class_='tweet-content')
-                tweet_text = tweet_content.get_text(strip=True) if tweet_content else ''
-                
-                # 获取推文时间
-                time_element = tweet_container.find('span', class_='tweet-date')
-                tweet_time = None
-                if time_element and time_element.find('a'):
-                    time_str = time_element.find('a').get('title', '')
-                    try:
-                        tweet_time = datetime.strptime(time_str, '%b %d, %Y · %I:%M %p UTC')
-                    except:
-                        print(f"无法解析时间: {time_str}")
-                
-                # 获取推文图片
-                tweet_image = None
-                image_container = tweet_container.find('div', class_='attachment')
-                if image_container:
-                    img = image_container.find('img')
-                    if img and 'src' in img.attrs:
-                        tweet_image = img['src']
-                        if not tweet_image.startswith('http'):
-                            tweet_image = base_url + tweet_image
-                
-                # 获取推文统计数据
-                stats = {}
-                stat_container = tweet_container.find('div', class_='tweet-stats')
-                if stat_container:
-                    for stat in stat_container.find_all('span', class_='tweet-stat'):
-                        value = stat.find('span', class_='tweet-stat-count')
-                        icon = stat.find('span', class_='icon-')
-                        if value and icon:
-                            stat_type = icon['class'][0].replace('icon-', '')
-                            stats[stat_type] = value.get_text(strip=True)
-                
-                # 获取推文链接和ID
-                tweet_link = tweet_container.find('a', class_='tweet-link')
-                tweet_id = tweet_link['href'].split('/')[-1] if tweet_link else None
-                
-                tweet_info = {
-                    'title': tweet_text[:100] + ('...' if len(tweet_text) > 100 else ''),
-                    'author': username,
-                    'url': f"https://twitter.com/{username}/status/{tweet_id}" if tweet_id else f"https://twitter.com/{username}",
-                    'thumbnail': tweet_image,
-                    'description': tweet_text,
-                    'time': tweet_time,
-                    'metrics': {
-                        'replies': stats.get('reply', '0'),
-                        'retweets': stats.get('retweet', '0'),
-                        'likes': stats.get('heart', '0'),
-                    }
-                }
+        """获取用户最新推文：按健康程度从好到差请求各实例（对冲请求），跳过熔断中的实例"""
+        try:
+            tweet_info = self.fetch_hedged(self.health.ranked(NITTER_INSTANCES), username)
+            if not tweet_info:
+                print("所有实例都尝试失败")
+            return tweet_info
+        finally:
+            self.save_health()
+    
+    def iter_latest_tweets(self, usernames):
+        """并发获取多个用户的最新推文，按完成顺序逐个返回 (用户名, 推文信息)
+
+        最多同时处理 workers 个用户，所有用户共用同一个会话和实例健康记录。
+        获取失败的用户返回 (用户名, None)。
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.track_user, username): username for username in usernames}
+            for future in as_completed(futures):
+                username = futures[future]
+                try:
+                    yield username, future.result()
+                except Exception as e:
+                    print(f"获取用户 @{username} 的推文时出错: {str(e)}")
+                    yield username, None
+    
+    def track_user(self, username):
+        """获取单个用户的最新推文并记录耗时"""
+        with metrics.track():
+            return self.get_user_latest_tweet(username)
+    
+    def fetch_hedged(self, instances, username):
+        """按顺序向实例发出请求，返回最先成功的结果
+
+        前一个请求超过 hedge_delay 秒没有结果或已失败时，立即请求下一个实例，
+        同时进行的请求最多 hedge 个。拿到结果后不再发出新的请求。
+        """
+        queue = list(instances)
+        pending = set()
+        # 已失败但还没有被新请求接替的请求数：接替失败请求的记为重试，其余的后续请求记为对冲
+        failed = 0
+        try:
+            while queue or pending:
+                if queue and len(pending) < self.hedge:
+                    if failed:
+                        failed -= 1
+                        metrics.record_retry()
+                    elif pending:
+                        metrics.record_hedge()
+                    pending.add(self.hedge_pool.submit(self.fetch_from_instance, queue.pop(0), username))
                 
-                print(f"成功获取推文: {tweet_info['title']}")
-                if tweet_time:
-                    print(f"推文时间: {tweet_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+                # 还能再发出请求时只等待 hedge_delay 秒，否则等到有请求完成
+                can_hedge = queue and len(pending) < self.hedge
+                done, pending = wait(pending, timeout=self.hedge_delay if can_hedge else None,
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    tweet_info = future.result()
+                    if tweet_info:
+                        return tweet_info
+                    failed += 1
+            return None
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    def fetch_from_instance(self, base_url, username):
+        """从单个实例获取用户最新推文并记录该实例的健康状况，失败时返回 None
+
+        优先读取RSS（体积小、不需要解析页面），实例没有提供RSS时才解析时间线页面。
+        """
+        try:
+            print(f"正在尝试使用 {base_url} 获取用户 @{username} 的推文...")
+            start = time.time()
+            tweet_info = self.fetch_feed(base_url, username)
+            if tweet_info is None:
+                print(f"{base_url} 没有提供RSS，改为解析时间线页面")
+                tweet_info = self.fetch_timeline(base_url, username)
+            self.health.record_success(base_url, time.time() - start)
+            
+            print(f"成功获取推文: {tweet_info['title']}")
+            if tweet_info['time']:
+                print(f"推文时间: {tweet_info['time'].strftime('%Y-%m-%d %H:%M:%S UTC')}")
+            return tweet_info
+            
+        except Exception as e:
+            print(f"请求失败 ({base_url}): {str(e)}")
+            cooldown = self.health.record_failure(base_url, e)
+            if cooldown:
+                print(f"{base_url} 连续失败，{cooldown // 60} 分钟内不再尝试")
+            return None
+    
+    def open_conditional(self, url, cache):
+        """发送带条件请求头的流式请求，返回 (响应, 上次的解析结果)，只有响应为 304 时解析结果不为 None
+
+        收到 304 但缓存中已没有解析结果时，丢弃校验信息并重新发送不带条件请求头的请求。
+        """
+        response = self.session.get(url, timeout=5, headers=cache.request_headers(url), stream=True)
+        if response.status_code != 304:
+            return response, None
+        cached = cache.cached_result(url)
+        if cached is not None:
+            return response, cached
+        response.close()
+        cache.forget(url)
+        return self.session.get(url, timeout=5, stream=True), None
+    
+    def fetch_feed(self, base_url, username):
+        """从实例的RSS获取用户最新推文，实例没有提供RSS时返回 None，其他错误时抛出异常"""
+        url = f"{base_url}/{username}/rss"
+        cache = get_validator_cache()
+        # 流式读取：第一条推文完整到达后关闭连接
+        response, cached = self.open_conditional(url, cache)
+        with response:
+            if cached is not None:
+                tweet_info = deserialize_tweet(cached)
+                print(f"RSS未变化，使用上次的结果: {tweet_info['title']}")
                 return tweet_info
-                
-            except requests.RequestException as e:
-                print(f"请求失败 ({base_url}): {str(e)}")
-                continue
-            except Exception as e:
-                print(f"处理失败 ({base_url}): {str(e)}")
-                continue
+            if response.status_code in FEED_MISSING_STATUS:
+                return None
+            response.raise_for_status()
+            # 有的实例关闭RSS后返回普通页面，不必下载
+            if 'html' in response.headers.get('Content-Type', ''):
+                return None
+            feed = feedparser.parse(read_first_feed_item(iter_text(response, metrics=metrics)))
         
-        print("所有实例都尝试失败")
-        return None
+        if not feed.version:
+            return None
+        if not feed.entries:
+            raise ValueError(f"RSS中没有用户 {username} 的推文")
+        tweet_info = parse_feed_item(feed.entries[0], username, base_url)
+        cache.update_from_response(url, response, serialize_tweets([tweet_info])[0])
+        return tweet_info
+    
+    def fetch_timeline(self, base_url, username):
+        """解析实例的时间线页面获取用户最新推文，失败时抛出异常"""
+        url = f"{base_url}/{username}"
+        cache = get_validator_cache()
+        # 流式读取：第一条推文完整到达后关闭连接，不下载页面的其余部分
+        response, cached = self.open_conditional(url, cache)
+        with response:
+            if cached is not None:
+                tweet_info = deserialize_tweet(cached)
+                print(f"页面未变化，使用上次的结果: {tweet_info['title']}")
+                return tweet_info
+            response.raise_for_status()
+            html = read_first_element(iter_text(response, metrics=metrics), 'div', 'timeline-item')
+        
+        tweet_info = parse_timeline(html, username, base_url)
+        if not tweet_info:
+            # 实例返回了页面但没有时间线（通常是被限流或已失效），同样记为失败
+            raise ValueError(f"页面中没有用户 {username} 的推文")
+        cache.update_from_response(url, response, serialize_tweets([tweet_info])[0])
+        return tweet_info
+    
+    def close(self):
+        """不等待后台进行中的对冲请求，直接关闭线程池"""
+        self.hedge_pool.shutdown(wait=False, cancel_futures=True)
+    
+    def save_health(self):
+        try:
+            self.health.save()
+        except OSError as e:
+            print(f"保存实例健康记录失败: {str(e)}")
 
 def generate_html(tweets):
     """生成展示推文信息的HTML页面"""
@@ -306,35 +511,54 @@ def generate_html(tweets):
     
     return html_file
 
-def save_tweets(tweets):
-    """保存推文到JSON文件"""
-    # 将datetime对象转换为字符串
+def serialize_tweets(tweets):
+    """将推文中的datetime对象转换为字符串，便于保存和渲染"""
     serializable_tweets = []
     for tweet in tweets:
         tweet_copy = tweet.copy()
-        if 'time' in tweet_copy:
+        if tweet_copy.get('time'):
             tweet_copy['time'] = tweet_copy['time'].strftime('%Y-%m-%d %H:%M:%S')
         serializable_tweets.append(tweet_copy)
+    return serializable_tweets
+
+def deserialize_tweet(tweet):
+    """serialize_tweets 的逆操作：将时间字符串还原为datetime对象"""
+    tweet_copy = dict(tweet)
+    if tweet_copy.get('time'):
+        tweet_copy['time'] = datetime.strptime(tweet_copy['time'], '%Y-%m-%d %H:%M:%S')
+    return tweet_copy
+
+def save_tweets(tweets):
+    """保存推文到内容库"""
+    # 将datetime对象转换为字符串
+    serializable_tweets = serialize_tweets(tweets)
     
-    output_file = os.path.join(os.path.dirname(__file__), 'tweets.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(serializable_tweets, f, ensure_ascii=False, indent=2)
-    print(f"\n推文已保存到: {output_file}")
+    count = get_store().upsert_items('x', serializable_tweets)
+    print(f"\n已保存 {count} 条推文到内容库")
 
-def main():
+# X用户名列表
+USERNAMES = [
+    'dotey',  # 宝玉
+]
+
+def run(usernames=USERNAMES, on_result=None):
+    """运行爬虫：获取推文、保存文件，并返回可序列化的推文列表
+
+    多个用户并发获取；每个用户完成时调用 on_result(用户名, 可序列化的推文)，便于先显示部分结果。
+    """
     # 创建X爬虫实例
     scraper = XScraper()
     
-    # X用户名列表
-    usernames = [
-        'dotey',  # 宝玉
-    ]
-    
     all_tweets = []
-    for username in usernames:
-        tweet = scraper.get_user_latest_tweet(username)
-        if tweet:
+    try:
+        for username, tweet in scraper.iter_latest_tweets(usernames):
+            if not tweet:
+                continue
             all_tweets.append(tweet)
+            if on_result:
+                on_result(username, serialize_tweets([tweet])[0])
+    finally:
+        scraper.close()
     
     if all_tweets:
         html_file = generate_html(all_tweets)
@@ -342,6 +566,12 @@ def main():
         print(f"\n共获取到 {len(all_tweets)} 条推文")
     else:
         print("\n未找到任何推文。")
+    
+    return serialize_tweets(all_tweets)
+
+def main():
+    run()
+    write_report('x_run_report.json', names=['x'])
 
 if __name__ == '__main__':
     main()
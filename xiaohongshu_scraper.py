@@ -2,14 +2,28 @@
 # -*- coding: utf-8 -*-
 
 import os
-import json
 import time
 import random
 import asyncio
+import re
 import logging
 from datetime import datetime
 from playwright.async_api import async_playwright
 from dotenv import load_dotenv
+from metrics import get_metrics, write_report
+from content_store import get_store
+from http_cassette import active_cassette
+
+metrics = get_metrics('xiaohongshu')
+
+# 笔记链接中的笔记ID（链接中的查询参数每次访问都会变化，不能直接作为ID）
+NOTE_ID_PATTERN = re.compile(r'/explore/(\w+)')
+
+def get_configured_users():
+    """从环境变量 XIAOHONGSHU_USERS 读取用户主页列表"""
+    load_dotenv()
+    users = os.getenv('XIAOHONGSHU_USERS', '').split(',')
+    return [user.strip() for user in users if user.strip()]
 
 class XiaohongshuScraper:
     def __init__(self):
@@ -60,6 +74,12 @@ class XiaohongshuScraper:
             }
         )
         
+        metrics.track_browser_context(self.context)
+        
+        # 在录制/回放模式下运行时，浏览器请求同样经过录制文件
+        if active_cassette():
+            await active_cassette().route_context(self.context)
+        
         # 修改 navigator.webdriver
         await self.context.add_init_script("""
             Object.defineProperty(navigator, 'webdriver', {
@@ -78,37 +98,38 @@ class XiaohongshuScraper:
         # 设置更长的超时时间
         self.page.set_default_timeout(60000)
         
-    async def get_user_videos(self, user_url):
-        """获取用户的视频信息"""
+    async def get_user_videos(self, user_url, page=None):
+        """获取用户的视频信息（可传入独立的 page 以便并发抓取）"""
+        page = page or self.page
         videos = []
         try:
             # 添加随机延迟
-            await asyncio.sleep(random.uniform(2, 5))
+            await metrics.async_sleep(random.uniform(2, 5))
             
             # 访问页面并等待加载
-            await self.page.goto(user_url, wait_until='networkidle')
-            await asyncio.sleep(random.uniform(3, 6))
+            await page.goto(user_url, wait_until='networkidle')
+            await metrics.async_sleep(random.uniform(3, 6))
             
             # 获取用户名
             username = "未知用户"
             try:
-                username_element = await self.page.wait_for_selector('.user-name')
+                username_element = await page.wait_for_selector('.user-name')
                 username = await username_element.text_content()
             except Exception:
                 self.logger.warning("无法获取用户名")
             
             # 多次滚动页面以加载更多内容
             for _ in range(3):
-                await self.page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
-                await asyncio.sleep(random.uniform(1, 2))
+                await page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
+                await metrics.async_sleep(random.uniform(1, 2))
             
             # 获取视频列表
-            note_items = await self.page.query_selector_all('.note-item')
+            note_items = await page.query_selector_all('.note-item')
             
             if not note_items:
                 self.logger.warning("未找到视频列表，尝试其他选择器")
                 # 尝试其他可能的选择器
-                note_items = await self.page.query_selector_all('[data-v-6e5b4cc1]')
+                note_items = await page.query_selector_all('[data-v-6e5b4cc1]')
             
             # 只检查前5个视频，找到第一个非置顶的就返回
             for element in note_items[:5]:
@@ -119,14 +140,24 @@ class XiaohongshuScraper:
                         self.logger.info("跳过置顶视频")
                         continue
                     
-                    # 找到第一个非置顶视频，获取信息并返回
-                    title = await element.wait_for_selector('.note-title, .title, h3')
-                    title_text = await title.text_content()
-                    
+                    # 找到第一个非置顶视频，先取链接判断是否已处理过
                     link = await element.wait_for_selector('a[href*="/explore/"]')
                     link_url = await link.get_attribute('href')
                     if not link_url.startswith('http'):
                         link_url = f"https://www.xiaohongshu.com{link_url}"
+                    match = NOTE_ID_PATTERN.search(link_url)
+                    note_id = match.group(1) if match else link_url.split('?')[0]
+                    
+                    # 已处理过的笔记直接使用内容库中的信息，跳过标题、缩略图和时间的查询
+                    store = get_store()
+                    if store.is_seen('xiaohongshu', note_id):
+                        stored = store.get_item('xiaohongshu', note_id)
+                        if stored:
+                            self.logger.info(f"笔记 {note_id} 已处理过，使用已保存的信息")
+                            return [stored]
+                    
+                    title = await element.wait_for_selector('.note-title, .title, h3')
+                    title_text = await title.text_content()
                     
                     # 获取缩略图
                     thumbnail = ""
@@ -145,6 +176,7 @@ class XiaohongshuScraper:
                         self.logger.warning(f"无法获取视频 {title_text} 的发布时间")
                     
                     video = {
+                        'platform_id': note_id,
                         'title': title_text,
                         'url': link_url,
                         'thumbnail': thumbnail,
@@ -166,14 +198,13 @@ class XiaohongshuScraper:
         
         return videos
             
-    def save_videos_to_json(self, videos, output_file='xiaohongshu_videos.json'):
-        """保存视频信息到JSON文件"""
+    def save_videos(self, videos):
+        """保存视频信息到内容库"""
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(videos, f, ensure_ascii=False, indent=2)
-            self.logger.info(f"已保存视频信息到 {output_file}")
+            count = get_store().upsert_items('xiaohongshu', videos)
+            self.logger.info(f"已保存 {count} 个视频到内容库")
         except Exception as e:
-            self.logger.error(f"保存JSON文件时出错: {str(e)}")
+            self.logger.error(f"保存到内容库时出错: {str(e)}")
             
     def generate_html(self, videos, output_file='xiaohongshu_videos.html'):
         """生成视频列表的HTML内容"""
@@ -210,8 +241,8 @@ class XiaohongshuScraper:
             load_dotenv()
             
             # 获取小红书用户列表
-            users = os.getenv('XIAOHONGSHU_USERS', '').split(',')
-            if not users or users[0] == '':
+            users = get_configured_users()
+            if not users:
                 print("错误：未在.env文件中找到XIAOHONGSHU_USERS配置")
                 return
             
@@ -223,12 +254,9 @@ class XiaohongshuScraper:
             
             # 遍历每个用户
             for user in users:
-                user = user.strip()
-                if not user:
-                    continue
-                
                 print(f"\n开始获取用户页面: {user}")
-                videos = await self.get_user_videos(user)
+                with metrics.track():
+                    videos = await self.get_user_videos(user)
                 if videos:
                     all_videos.extend(videos)
                     print(f"成功获取到 {len(videos)} 个视频")
@@ -236,11 +264,11 @@ class XiaohongshuScraper:
                     print(f"未能获取到用户视频信息")
                 
                 # 在用户之间添加随机延迟
-                await asyncio.sleep(random.uniform(3, 6))
+                await metrics.async_sleep(random.uniform(3, 6))
             
             if all_videos:
                 # 保存视频信息
-                self.save_videos_to_json(all_videos)
+                self.save_videos(all_videos)
                 self.generate_html(all_videos)
                 print(f"\n总计获取到 {len(all_videos)} 个视频")
             else:
@@ -269,6 +297,7 @@ async def main():
     
     scraper = XiaohongshuScraper()
     await scraper.run_scraper()
+    write_report('xiaohongshu_run_report.json', names=['xiaohongshu'])
 
 if __name__ == "__main__":
     asyncio.run(main())
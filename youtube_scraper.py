@@ -1,6 +1,5 @@
-import os
-import json
 import time
+from datetime import datetime
 import requests
 from bs4 import BeautifulSoup
 import yt_dlp
@@ -8,6 +7,16 @@ import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 import subprocess
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from metrics import get_metrics, write_report
+from content_store import get_store
+from http_cache import get_http_cache
+
+metrics = get_metrics('youtube')
+
+def track_channel(channel_url):
+    """获取单个频道的视频并记录耗时"""
+    with metrics.track():
+        return get_youtube_videos(channel_url)
 
 def get_youtube_videos(channel_url):
     """
@@ -39,11 +48,22 @@ def get_youtube_videos(channel_url):
                 # 尝试获取频道的视频列表
                 videos_url = f"{channel_url}/videos"
                 print(f"尝试获取视频列表: {videos_url}")
-                channel_info = ydl.extract_info(videos_url, download=False)
+                # 频道页在缓存有效期内直接使用共享缓存中的结果
+                cache = get_http_cache()
+                channel_info = cache.get_json(videos_url)
+                if channel_info is None:
+                    channel_info = ydl.extract_info(videos_url, download=False)
+                    metrics.record_request(videos_url, ok=bool(channel_info))
+                    if channel_info and channel_info.get('entries'):
+                        cache.put_json(videos_url, ydl.sanitize_info(channel_info))
+                else:
+                    print("使用缓存的视频列表")
                 
                 if not channel_info or not channel_info.get('entries'):
                     print(f"尝试直接从频道获取: {channel_url}")
+                    metrics.record_retry()
                     channel_info = ydl.extract_info(channel_url, download=False)
+                    metrics.record_request(channel_url, ok=bool(channel_info))
                 
                 if not channel_info:
                     print(f"无法获取频道 {channel_url} 的信息")
@@ -61,6 +81,14 @@ def get_youtube_videos(channel_url):
                         print("未找到视频ID")
                         return []
                     
+                    # 已处理过的视频直接使用内容库中的信息，跳过详细信息请求
+                    store = get_store()
+                    if store.is_seen('youtube', video_id):
+                        stored = store.get_item('youtube', video_id)
+                        if stored:
+                            print(f"视频 {video_id} 已处理过，使用已保存的信息")
+                            return [stored]
+                    
                     # 获取视频详细信息，不下载视频
                     try:
                         video_url = f"https://www.youtube.com/watch?v={video_id}"
@@ -76,16 +104,25 @@ def get_youtube_videos(channel_url):
                         
                         with yt_dlp.YoutubeDL(info_opts) as info_ydl:
                             video_info = info_ydl.extract_info(video_url, download=False)
+                        metrics.record_request(video_url, ok=bool(video_info))
                         
                         if video_info:
                             # 使用默认的高质量缩略图
                             thumbnail = f'https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg'
                             
+                            # 发布时间（用于估计频道的更新频率）
+                            published = None
+                            if video_info.get('timestamp'):
+                                published = datetime.fromtimestamp(video_info['timestamp'])
+                            elif video_info.get('upload_date'):
+                                published = datetime.strptime(video_info['upload_date'], '%Y%m%d')
+                            
                             videos.append({
                                 'channel': video_info.get('uploader', '未知频道'),
                                 'title': video_info.get('title', '未知标题'),
                                 'url': video_url,
-                                'thumbnail': thumbnail
+                                'thumbnail': thumbnail,
+                                'time': published.strftime('%Y-%m-%d %H:%M:%S') if published else None
                             })
                             print(f"成功获取视频信息: {video_info.get('title', '未知标题')}")
                     except Exception as e:
@@ -209,31 +246,27 @@ def generate_html(videos, filename='youtube_videos.html'):
     except Exception as e:
         print(f"保存HTML文件时发生错误: {str(e)}")
 
-def save_videos_to_json(videos):
-    """保存视频信息到JSON文件"""
-    output_file = os.path.join(os.path.dirname(__file__), 'youtube_videos.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(videos, f, ensure_ascii=False, indent=2)
-    print(f"\n视频信息已保存到: {output_file}")
+def save_videos(videos):
+    """保存视频信息到内容库"""
+    count = get_store().upsert_items('youtube', videos)
+    print(f"\n已保存 {count} 个视频到内容库")
 
-def main():
-    """
-    主函数
-    """
-    # YouTube频道列表
-    channels = [
-        'https://www.youtube.com/@nicolevdh',  # Nicole van der Hoeven
-        'https://www.youtube.com/@TheVerge',   # The Verge
-        'https://www.youtube.com/@mkbhd',      # Marques Brownlee (MKBHD)
-        'https://www.youtube.com/@lexfridman', # Lex Fridman
-    ]
-    
+# YouTube频道列表
+CHANNELS = [
+    'https://www.youtube.com/@nicolevdh',  # Nicole van der Hoeven
+    'https://www.youtube.com/@TheVerge',   # The Verge
+    'https://www.youtube.com/@mkbhd',      # Marques Brownlee (MKBHD)
+    'https://www.youtube.com/@lexfridman', # Lex Fridman
+]
+
+def fetch_all_videos(channels=CHANNELS):
+    """并发获取所有频道的最新视频，返回视频列表"""
     all_videos = []
     
     # 使用线程池并发获取视频信息
     with ThreadPoolExecutor(max_workers=4) as executor:
         # 创建future对象的字典，用于跟踪每个任务
-        future_to_channel = {executor.submit(get_youtube_videos, channel): channel for channel in channels}
+        future_to_channel = {executor.submit(track_channel, channel): channel for channel in channels}
         
         # 处理完成的任务
         for future in as_completed(future_to_channel):
@@ -248,12 +281,27 @@ def main():
             except Exception as e:
                 print(f"处理频道 {channel} 时发生错误: {str(e)}")
     
+    return all_videos
+
+def run(channels=CHANNELS):
+    """运行爬虫：获取视频、保存文件，并返回视频列表"""
+    all_videos = fetch_all_videos(channels)
+    
     if all_videos:
         generate_html(all_videos)
-        save_videos_to_json(all_videos)
+        save_videos(all_videos)
         print(f"\n共获取到 {len(all_videos)} 个视频的信息")
     else:
         print("\n未找到任何视频。")
+    
+    return all_videos
+
+def main():
+    """
+    主函数
+    """
+    run()
+    write_report('youtube_run_report.json', names=['youtube'])
 
 if __name__ == "__main__":
     main()